@@ -88,7 +88,7 @@ function Install-PythonDependencies {
         # Install required packages
         Write-Status "Installing Python packages..."
         python -m pip install --upgrade pip
-        python -m pip install psutil requests cryptography pywin32
+        python -m pip install psutil requests cryptography aiohttp orjson zstandard pywin32
         
         Write-Status "Python dependencies installed successfully"
     }
@@ -133,7 +133,7 @@ install_agent() {
     chmod +x $AGENT_DIR/nocbrain-agent.py
     
     # Install Python dependencies
-    sudo -u $AGENT_USER python3 -m pip install --user psutil requests cryptography
+    sudo -u $AGENT_USER python3 -m pip install --user psutil requests cryptography aiohttp orjson zstandard
     
     # Create symlink
     ln -sf $AGENT_DIR/nocbrain-agent.py /usr/local/bin/nocbrain-agent
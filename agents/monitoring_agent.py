@@ -5,20 +5,29 @@ Real-time network and system monitoring with AI analysis
 """
 
 import asyncio
+import errno
 import json
 import logging
+import math
+import selectors
 import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import psutil
 import socket
-import requests
-from dataclasses import dataclass
+import aiohttp
+from dataclasses import dataclass, asdict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class SystemMetrics:
     """System metrics data structure"""
     timestamp: str
@@ -29,7 +38,7 @@ class SystemMetrics:
     process_count: int
     load_average: List[float]
 
-@dataclass
+@dataclass(slots=True)
 class NetworkMetrics:
     """Network metrics data structure"""
     timestamp: str
@@ -39,24 +48,210 @@ class NetworkMetrics:
     bandwidth_usage: Dict[str, float]
     connection_count: int
 
+class RollingStats:
+    """Rolling mean/standard deviation over the last `window` samples (windowed Welford)"""
+    
+    def __init__(self, window: int = 256):
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._evictions = 0
+    
+    def update(self, value: float):
+        """Add a sample, evicting the oldest once the window is full"""
+        if len(self.values) == self.values.maxlen:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        delta = value - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (value - self.mean)
+    
+    def _remove(self, old: float):
+        """Reverse the Welford update for a sample just evicted from the window"""
+        n = len(self.values)
+        self._evictions += 1
+        if self._evictions >= self.values.maxlen or n == 0:
+            # Recompute from the window now and then so reverse updates cannot drift
+            self._evictions = 0
+            self.mean = math.fsum(self.values) / n if n else 0.0
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+            return
+        
+        delta = old - self.mean
+        self.mean -= delta / n
+        self.m2 = max(self.m2 - delta * (old - self.mean), 0.0)
+    
+    @property
+    def count(self) -> int:
+        return len(self.values)
+    
+    @property
+    def std(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (n - 1))
+    
+    def zscore(self, value: float, min_std: float = 0.0) -> float:
+        """Standard score of value against the current window, with std floored at min_std"""
+        std = max(self.std, min_std)
+        return (value - self.mean) / std if std > 0 else 0.0
+
+# metric -> (anomaly message, recommendation, severity) used when a metric spikes
+# metric: (absolute threshold, message, recommendation, severity)
+ANOMALY_RULES = {
+    'cpu_percent': (80, 'High CPU usage detected', 'Check for runaway processes', 'warning'),
+    'memory_percent': (85, 'High memory usage detected', 'Check for memory leaks', 'warning'),
+    'disk_usage': (90, 'Low disk space', 'Clean up old logs and temporary files', 'critical')
+}
+
+SEVERITY_RANK = {'normal': 0, 'warning': 1, 'critical': 2}
+
+def _probe_address(family: int, sockaddr: tuple, ports: List[int], timeout: float) -> Dict[int, float]:
+    """Return the ports that accept a TCP connect on one resolved address, with their connect times in seconds"""
+    connect_times = {}
+    selector = selectors.DefaultSelector()
+    sockets = []
+    
+    try:
+        for port in ports:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sockets.append(sock)
+            started = time.monotonic()
+            result = sock.connect_ex((sockaddr[0], port) + tuple(sockaddr[2:]))
+            if result == 0:
+                connect_times[port] = time.monotonic() - started
+            elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                selector.register(sock, selectors.EVENT_WRITE, (port, started))
+        
+        # Collect connect completions until all sockets resolve or the timeout expires
+        deadline = time.monotonic() + timeout
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    port, started = key.data
+                    connect_times[port] = time.monotonic() - started
+                selector.unregister(key.fileobj)
+    except OSError as e:
+        # e.g. an address family the host has no stack for
+        logger.debug(f"Cannot probe {sockaddr[0]}: {e}")
+    finally:
+        selector.close()
+        for sock in sockets:
+            sock.close()
+    
+    return connect_times
+
+def probe_ports(target: str, ports: List[int], timeout: float = 1.0) -> Dict[int, float]:
+    """Connect times in seconds of the open TCP ports, probed with non-blocking connects on a single selector
+    
+    Every resolved address is tried in turn for the ports still closed, so an
+    unreachable IPv6 address does not hide an open IPv4 one. An unresolvable
+    target has no open ports.
+    """
+    try:
+        addresses = socket.getaddrinfo(target, None, type=socket.SOCK_STREAM)
+    except OSError as e:
+        logger.warning(f"Cannot resolve {target}: {e}")
+        return {}
+    
+    connect_times: Dict[int, float] = {}
+    seen = set()
+    for family, _, _, _, sockaddr in addresses:
+        pending = [port for port in ports if port not in connect_times]
+        if not pending:
+            break
+        if sockaddr[0] in seen:
+            continue
+        seen.add(sockaddr[0])
+        connect_times.update(_probe_address(family, sockaddr, pending, timeout))
+    
+    return connect_times
+
+def scan_ports(target: str, ports: List[int], timeout: float = 1.0) -> Dict[str, bool]:
+    """Report which TCP ports accept connections, keyed by port string"""
+    open_ports = probe_ports(target, ports, timeout)
+    return {str(port): port in open_ports for port in ports}
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
 class MonitoringAgent:
     """Main monitoring agent class"""
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.api_endpoint = config.get('api_endpoint', 'http://localhost:8000/api/v1')
+        self._metrics_url = f"{self.api_endpoint}/monitoring/metrics"
         self.agent_id = config.get('agent_id', 'agent-001')
         self.monitoring_interval = config.get('interval', 30)
         self.targets = config.get('targets', [])
+        self.collect_connections = config.get('collect_connections', True)
+        self.conn_ttl = config.get('conn_ttl', 30)
         self.running = False
         
+        # (monotonic timestamp, count) of the last net_connections() walk
+        self._conn_cache = (float('-inf'), 0)
+        
+        # ISO timestamp shared by every record collected in the current cycle
+        self._cycle_ts = datetime.utcnow().isoformat()
+        
+        # Rolling baselines for z-score anomaly detection
+        self.anomaly_z_threshold = config.get('anomaly_z_threshold', 3.0)
+        self.anomaly_min_samples = config.get('anomaly_min_samples', 30)
+        # Percentage points; keeps a flat baseline from turning float noise into huge z-scores
+        self.anomaly_min_std = config.get('anomaly_min_std', 1.0)
+        window = config.get('anomaly_window', 256)
+        self._stats = {metric: RollingStats(window) for metric in ANOMALY_RULES}
+        
+        # Prime CPU counters so later calls return the delta since the previous one
+        psutil.cpu_percent(interval=None)
+        
+        # Keep-alive HTTP session, created lazily on the running loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        
         logger.info(f"Monitoring Agent {self.agent_id} initialized")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'Content-Type': 'application/json',
+                    'X-Agent-ID': self.agent_id
+                },
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _count_connections(self) -> int:
+        """Count inet connections, refreshing at most once per conn_ttl seconds"""
+        if not self.collect_connections:
+            return 0
+        
+        now = time.monotonic()
+        if now - self._conn_cache[0] > self.conn_ttl:
+            self._conn_cache = (now, len(psutil.net_connections(kind='inet')))
+        return self._conn_cache[1]
+    
     async def collect_system_metrics(self) -> SystemMetrics:
         """Collect system performance metrics"""
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Memory metrics
             memory = psutil.virtual_memory()
@@ -85,7 +280,7 @@ class MonitoringAgent:
                 load_average = [0.0, 0.0, 0.0]
             
             return SystemMetrics(
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=self._cycle_ts,
                 cpu_percent=cpu_percent,
                 memory_percent=memory_percent,
                 disk_usage=disk_usage,
@@ -101,40 +296,22 @@ class MonitoringAgent:
     async def collect_network_metrics(self, target: str) -> NetworkMetrics:
         """Collect network metrics for a target"""
         try:
-            # Ping test
-            start_time = time.time()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            
-            try:
-                sock.connect((target, 80))
-                ping_time = (time.time() - start_time) * 1000
-                sock.close()
-            except:
-                ping_time = -1
-            
-            # Port scanning
+            # Port scanning: all connects share one selector in a worker thread
             common_ports = [22, 80, 443, 3306, 5432, 6379, 8000, 8080]
-            port_status = {}
+            connect_times = await asyncio.to_thread(probe_ports, target, common_ports)
+            port_status = {str(port): port in connect_times for port in common_ports}
             
-            for port in common_ports:
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(1)
-                    result = sock.connect_ex((target, port))
-                    port_status[str(port)] = result == 0
-                    sock.close()
-                except:
-                    port_status[str(port)] = False
+            # Ping test: the scan's TCP connect time to port 80
+            ping_time = connect_times[80] * 1000 if 80 in connect_times else -1
             
             # Connection count
             try:
-                connections = len(psutil.net_connections())
+                connections = self._count_connections()
             except:
                 connections = 0
             
             return NetworkMetrics(
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=self._cycle_ts,
                 host=target,
                 ping_time=ping_time,
                 port_status=port_status,
@@ -149,30 +326,42 @@ class MonitoringAgent:
     async def analyze_with_ai(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze metrics with AI (simplified version)"""
         try:
-            # Simple rule-based analysis (in real version, would call AI API)
+            # Fixed thresholds always apply; values more than N standard deviations
+            # from the rolling baseline are flagged too (in real version, would call AI API)
             analysis = {
                 'anomalies': [],
                 'recommendations': [],
                 'severity': 'normal'
             }
             
-            # CPU analysis
-            if metrics.get('cpu_percent', 0) > 80:
-                analysis['anomalies'].append('High CPU usage detected')
-                analysis['recommendations'].append('Check for runaway processes')
-                analysis['severity'] = 'warning'
-            
-            # Memory analysis
-            if metrics.get('memory_percent', 0) > 85:
-                analysis['anomalies'].append('High memory usage detected')
-                analysis['recommendations'].append('Check for memory leaks')
-                analysis['severity'] = 'warning'
-            
-            # Disk analysis
-            if metrics.get('disk_usage', 0) > 90:
-                analysis['anomalies'].append('Low disk space')
-                analysis['recommendations'].append('Clean up old logs and temporary files')
-                analysis['severity'] = 'critical'
+            for metric, (threshold, message, recommendation, severity) in ANOMALY_RULES.items():
+                value = metrics.get(metric)
+                if value is None:
+                    continue
+                
+                stats = self._stats[metric]
+                # Score against the baseline before the new sample is folded in
+                z = stats.zscore(value, self.anomaly_min_std)
+                baseline_ready = stats.count >= self.anomaly_min_samples
+                stats.update(value)
+                
+                label = metric.replace('_', ' ')
+                if value > threshold:
+                    analysis['anomalies'].append(message)
+                    analysis['recommendations'].append(recommendation)
+                elif not baseline_ready or abs(z) <= self.anomaly_z_threshold:
+                    continue
+                elif z > 0:
+                    analysis['anomalies'].append(f"Unusual rise in {label}")
+                    analysis['recommendations'].append(recommendation)
+                    severity = 'warning'
+                else:
+                    analysis['anomalies'].append(f"Unusual drop in {label}")
+                    analysis['recommendations'].append('Verify expected workloads are running')
+                    severity = 'warning'
+                
+                if SEVERITY_RANK[severity] > SEVERITY_RANK[analysis['severity']]:
+                    analysis['severity'] = severity
             
             return analysis
             
@@ -183,77 +372,100 @@ class MonitoringAgent:
     async def send_to_api(self, data: Dict[str, Any]) -> bool:
         """Send monitoring data to central API"""
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'X-Agent-ID': self.agent_id
-            }
-            
-            response = requests.post(
-                f"{self.api_endpoint}/monitoring/metrics",
-                json=data,
-                headers=headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.debug(f"Successfully sent metrics to API")
-                return True
-            else:
-                logger.warning(f"API returned status {response.status_code}")
-                return False
+            async with self._get_session().post(
+                self._metrics_url,
+                data=dumps_json(data),
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    logger.debug(f"Successfully sent metrics to API")
+                    return True
+                else:
+                    logger.warning(f"API returned status {response.status}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Error sending data to API: {e}")
             return False
     
+    async def process_target(self, target: str) -> Optional[Dict[str, Any]]:
+        """Collect and analyze network metrics for one target"""
+        network_metrics = await self.collect_network_metrics(target)
+        if not network_metrics:
+            return None
+        
+        metrics_dict = asdict(network_metrics)
+        network_data = {
+            'agent_id': self.agent_id,
+            'type': 'network',
+            'target': target,
+            'metrics': metrics_dict,
+            'timestamp': network_metrics.timestamp
+        }
+        
+        # Analyze with AI
+        network_data['analysis'] = await self.analyze_with_ai(metrics_dict)
+        return network_data
+    
     async def monitoring_loop(self):
         """Main monitoring loop"""
         logger.info("Starting monitoring loop")
         
+        # Give the primed CPU counters a non-zero window before the first sample
+        await asyncio.sleep(0.1)
+        
+        # Absolute monotonic deadlines keep cycles aligned regardless of wall-clock changes
+        deadline = time.monotonic()
         while self.running:
+            deadline += self.monitoring_interval
             try:
+                self._cycle_ts = datetime.utcnow().isoformat()
+                
                 # Collect system metrics
                 system_metrics = await self.collect_system_metrics()
                 if system_metrics:
+                    metrics_dict = asdict(system_metrics)
                     system_data = {
                         'agent_id': self.agent_id,
                         'type': 'system',
-                        'metrics': system_metrics.__dict__,
+                        'metrics': metrics_dict,
                         'timestamp': system_metrics.timestamp
                     }
                     
                     # Analyze with AI
-                    analysis = await self.analyze_with_ai(system_metrics.__dict__)
+                    analysis = await self.analyze_with_ai(metrics_dict)
                     system_data['analysis'] = analysis
                     
                     # Send to API
                     await self.send_to_api(system_data)
                 
-                # Collect network metrics for each target
-                for target in self.targets:
-                    network_metrics = await self.collect_network_metrics(target)
-                    if network_metrics:
-                        network_data = {
-                            'agent_id': self.agent_id,
-                            'type': 'network',
-                            'target': target,
-                            'metrics': network_metrics.__dict__,
-                            'timestamp': network_metrics.timestamp
-                        }
-                        
-                        # Analyze with AI
-                        analysis = await self.analyze_with_ai(network_metrics.__dict__)
-                        network_data['analysis'] = analysis
-                        
-                        # Send to API
-                        await self.send_to_api(network_data)
+                # Collect network metrics for all targets concurrently
+                results = await asyncio.gather(
+                    *(self.process_target(target) for target in self.targets),
+                    return_exceptions=True
+                )
+                
+                network_payloads = []
+                for target, result in zip(self.targets, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error processing target {target}: {result}")
+                    elif result:
+                        network_payloads.append(result)
+                
+                # Send to API over the shared keep-alive session
+                await asyncio.gather(*(self.send_to_api(data) for data in network_payloads))
                 
-                # Wait for next interval
-                await asyncio.sleep(self.monitoring_interval)
+                # Wait for next deadline; if the cycle overran, skip the missed slots
+                now = time.monotonic()
+                if now < deadline:
+                    await asyncio.sleep(deadline - now)
+                else:
+                    deadline = now
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(5)
+                deadline = time.monotonic()
     
     async def start(self):
         """Start the monitoring agent"""
@@ -268,6 +480,7 @@ class MonitoringAgent:
             logger.error(f"Unexpected error: {e}")
         finally:
             self.running = False
+            await self.close()
             logger.info("Monitoring agent stopped")
     
     def stop(self):
@@ -14,17 +14,168 @@ import platform
 import socket
 import time
 import hashlib
+import threading
 import psutil
 import requests
+from requests.adapters import HTTPAdapter
+import aiohttp
 from datetime import datetime
-from typing import Dict, Any, Optional
-from cryptography.fernet import Fernet
+from typing import Dict, Any, List, Optional, Tuple
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
 
 # Configuration
 DEFAULT_SERVER_URL = "https://api.nocbrain.com"
 DEFAULT_COLLECTION_INTERVAL = 60
+DEFAULT_CONN_TTL = 30
+DEFAULT_STATIC_TTL = 6 * 3600
 DEFAULT_API_KEY = None
 
+# Maximum number of application collections to skip after a status probe fails
+MAX_PROBE_BACKOFF = 64
+
+# Per-collector intervals in seconds; 'system' defaults to the collection interval
+DEFAULT_SCHEDULE = {
+    'disk': 300,
+    'app': 60
+}
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+class ProcReader:
+    """Read Linux /proc counters through long-lived file descriptors
+    
+    Each read is a single pread() at offset 0 followed by a bytes.split() parse,
+    bypassing psutil's per-call open/parse for the hot per-cycle metrics.
+    """
+    
+    PATHS = {
+        'stat': '/proc/stat',
+        'meminfo': '/proc/meminfo',
+        'net_dev': '/proc/net/dev',
+        'loadavg': '/proc/loadavg'
+    }
+    
+    def __init__(self):
+        self._fds: Dict[str, int] = {}
+        try:
+            for name, path in self.PATHS.items():
+                self._fds[name] = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.close()
+            raise
+        self._last_cpu = self._read_cpu_times()
+    
+    def close(self):
+        """Close all file descriptors"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+    
+    def _read(self, name: str) -> bytes:
+        fd = self._fds[name]
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b''.join(chunks)
+    
+    def _read_cpu_times(self) -> Tuple[int, int]:
+        """Return (busy, total) jiffies from the aggregate cpu line"""
+        first_line = os.pread(self._fds['stat'], 4096, 0).split(b'\n', 1)[0]
+        # user nice system idle iowait irq softirq steal [guest guest_nice]
+        fields = [int(v) for v in first_line.split()[1:9]]
+        total = sum(fields)
+        idle = fields[3] + fields[4]
+        return total - idle, total
+    
+    def cpu_percent(self) -> float:
+        """CPU utilisation since the previous call"""
+        busy, total = self._read_cpu_times()
+        last_busy, last_total = self._last_cpu
+        self._last_cpu = (busy, total)
+        delta_total = total - last_total
+        if delta_total <= 0:
+            return 0.0
+        return round(100.0 * (busy - last_busy) / delta_total, 1)
+    
+    def memory(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return (virtual, swap) memory in bytes, matching psutil's fields"""
+        info = {}
+        for line in self._read('meminfo').split(b'\n'):
+            parts = line.split()
+            if len(parts) >= 2:
+                info[parts[0].rstrip(b':')] = int(parts[1]) * 1024
+        
+        total = info[b'MemTotal']
+        free = info[b'MemFree']
+        cached = info.get(b'Cached', 0) + info.get(b'SReclaimable', 0)
+        buffers = info.get(b'Buffers', 0)
+        available = info.get(b'MemAvailable', free + cached + buffers)
+        used = total - free - cached - buffers
+        if used < 0:
+            used = total - free
+        virtual = {
+            'total': total,
+            'available': available,
+            'used': used,
+            'free': free,
+            'percent': round((total - available) / total * 100, 1) if total else 0.0
+        }
+        
+        swap_total = info.get(b'SwapTotal', 0)
+        swap_free = info.get(b'SwapFree', 0)
+        swap_used = swap_total - swap_free
+        swap = {
+            'total': swap_total,
+            'used': swap_used,
+            'free': swap_free,
+            'percent': round(swap_used / swap_total * 100, 1) if swap_total else 0.0
+        }
+        return virtual, swap
+    
+    def net_io(self) -> Dict[str, int]:
+        """Return byte/packet counters summed over all interfaces"""
+        bytes_recv = packets_recv = bytes_sent = packets_sent = 0
+        # Skip the two header lines
+        for line in self._read('net_dev').split(b'\n')[2:]:
+            if b':' not in line:
+                continue
+            fields = line.split(b':', 1)[1].split()
+            bytes_recv += int(fields[0])
+            packets_recv += int(fields[1])
+            bytes_sent += int(fields[8])
+            packets_sent += int(fields[9])
+        return {
+            'bytes_sent': bytes_sent,
+            'bytes_recv': bytes_recv,
+            'packets_sent': packets_sent,
+            'packets_recv': packets_recv
+        }
+    
+    def load_average(self) -> List[float]:
+        """Return the 1, 5 and 15 minute load averages"""
+        return [float(v) for v in self._read('loadavg').split()[:3]]
+
+
 class NOCBRAINAgent:
     """NOCbRAIN Monitoring Agent"""
     
@@ -34,12 +185,44 @@ class NOCBRAINAgent:
         self.agent_id = config['agent_id']
         self.collection_interval = config.get('collection_interval', DEFAULT_COLLECTION_INTERVAL)
         self.encryption_enabled = config.get('encryption_enabled', True)
-        self.compression_enabled = config.get('compression_enabled', True)
+        self.compression_enabled = config.get('compression_enabled', True) and zstd is not None
+        self.collect_connections = config.get('collect_connections', True)
+        self.conn_ttl = config.get('conn_ttl', DEFAULT_CONN_TTL)
+        
+        # Collectors run on their own cadence; the main loop ticks every collection_interval
+        self.schedule = {'system': self.collection_interval, **DEFAULT_SCHEDULE}
+        self.schedule.update(config.get('schedule', {}))
+        self._next_due: Dict[str, float] = {}
+        
+        # HTTP status probes, skipped with exponential backoff while unreachable
+        self._app_probes = {
+            'nginx': self._get_nginx_stats,
+            'apache': self._get_apache_stats
+        }
+        self._probe_backoff = {name: 0 for name in self._app_probes}
+        self._probe_skip = {name: 0 for name in self._app_probes}
+        
+        # ISO timestamp shared by every payload built in the current cycle
+        self._cycle_ts = datetime.utcnow().isoformat()
+        
+        # (monotonic timestamp, count) of the last net_connections() walk
+        self._conn_cache = (float('-inf'), 0)
+        
+        # Values that do not change while the agent runs, refreshed every static_ttl seconds
+        self.static_ttl = config.get('static_ttl', DEFAULT_STATIC_TTL)
+        self._static: Dict[str, Any] = {}
+        self._static_refreshed = float('-inf')
+        self._get_static_info()
         
         # Generate encryption key from API key
         if self.encryption_enabled:
             self.encryption_key = self._derive_encryption_key(self.api_key)
-            self.cipher = Fernet(self.encryption_key)
+            self.cipher = AESGCM(self.encryption_key)
+        
+        # Reused zstd compressor; instances are not safe for concurrent use across threads
+        if self.compression_enabled:
+            self._zctx = zstd.ZstdCompressor(level=3)
+            self._zctx_lock = threading.Lock()
         
         self.hostname = socket.gethostname()
         self.platform = platform.system()
@@ -47,118 +230,265 @@ class NOCBRAINAgent:
         self.session = requests.Session()
         
         # Setup session headers
-        self.session.headers.update({
+        self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json',
             'User-Agent': f'NOCbRAIN-Agent/1.0.0 ({self.platform})'
-        })
+        }
+        self.session.headers.update(self.headers)
+        self.session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, pool_block=False))
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, pool_block=False))
+        
+        # Endpoint URLs and constant per-payload headers, built once
+        self._metrics_url = f"{self.server_url}/api/v1/monitoring/metrics"
+        self._heartbeat_url = f"{self.server_url}/api/v1/monitoring/heartbeat"
+        self._bundle_url = f"{self.server_url}/api/v1/monitoring/bundle"
+        self._payload_headers = {'X-Agent-ID': self.agent_id}
+        if self.encryption_enabled:
+            self._payload_headers['Content-Type'] = 'application/octet-stream'
+        if self.compression_enabled:
+            self._payload_headers['X-Payload-Encoding'] = 'zstd'
+        
+        # Async HTTP session for posting to the server (created lazily on the running loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Cleared if the server does not expose the bundle endpoint
+        self.bundle_supported = True
         
         # SSL context for HTTPS
         self.ssl_context = ssl.create_default_context()
         self.ssl_context.check_hostname = True
         self.ssl_context.verify_mode = ssl.CERT_REQUIRED
+        
+        # Cached handle to the agent's own process; primed so cpu_percent() returns a delta
+        self._process = psutil.Process(os.getpid())
+        self._process.cpu_percent(interval=None)
+        
+        # Prime system-wide CPU counters so later calls return the delta since the previous one
+        psutil.cpu_percent(interval=None)
+        
+        # Direct /proc reader for the hot metrics on Linux; psutil is used elsewhere
+        self._proc: Optional[ProcReader] = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._proc = ProcReader()
+            except OSError as e:
+                print(f"Falling back to psutil for system metrics: {e}")
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(
+                    limit=32, ttl_dns_cache=300, ssl=self.ssl_context
+                )
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._proc is not None:
+            self._proc.close()
+            self._proc = None
     
     def _derive_encryption_key(self, api_key: str) -> bytes:
         """Derive encryption key from API key"""
         return hashlib.sha256(api_key.encode()).digest()[:32]
     
-    def _encrypt_data(self, data: Dict[str, Any]) -> str:
-        """Encrypt monitoring data"""
+    def _encode_payload(self, data: Dict[str, Any]) -> bytes:
+        """Serialize, compress (zstd) and encrypt (AES-256-GCM) a payload
+        
+        Encrypted output is nonce + ciphertext + tag. Compression happens before
+        encryption since ciphertext does not compress.
+        """
+        raw = dumps_json(data)
+        if self.compression_enabled:
+            with self._zctx_lock:
+                raw = self._zctx.compress(raw)
         if not self.encryption_enabled:
-            return json.dumps(data)
+            return raw
         
-        json_data = json.dumps(data).encode()
-        encrypted = self.cipher.encrypt(json_data)
-        return encrypted.decode()
+        nonce = os.urandom(12)
+        return nonce + self.cipher.encrypt(nonce, raw, None)
     
-    def _collect_system_metrics(self) -> Dict[str, Any]:
+    async def _prepare_body(self, data: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+        """Build the request body and extra headers for a metrics payload
+        
+        Encrypted payloads are sent as raw binary with the metadata in headers;
+        encoding runs in the default executor so large payloads don't stall the loop.
+        """
+        if not self.encryption_enabled and not self.compression_enabled:
+            return dumps_json(data), {}
+        
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, self._encode_payload, data)
+        return body, {**self._payload_headers, 'X-Timestamp': self._cycle_ts}
+    
+    def _get_static_info(self) -> Dict[str, Any]:
+        """Return cached CPU count/frequency limits, boot time and disk partitions"""
+        now = time.monotonic()
+        if now - self._static_refreshed > self.static_ttl:
+            cpu_freq = psutil.cpu_freq()
+            self._static = {
+                'cpu_count': psutil.cpu_count(),
+                'cpu_freq_min': cpu_freq.min if cpu_freq else None,
+                'cpu_freq_max': cpu_freq.max if cpu_freq else None,
+                'boot_time': psutil.boot_time(),
+                'partitions': psutil.disk_partitions()
+            }
+            self._static_refreshed = now
+        return self._static
+    
+    def _count_connections(self) -> int:
+        """Count inet connections, refreshing at most once per conn_ttl seconds"""
+        if not self.collect_connections:
+            return 0
+        
+        now = time.monotonic()
+        if now - self._conn_cache[0] > self.conn_ttl:
+            self._conn_cache = (now, len(psutil.net_connections(kind='inet')))
+        return self._conn_cache[1]
+    
+    def _disk_usage(self, mountpoint: str) -> Dict[str, Any]:
+        """Return disk usage for a mountpoint, calling statvfs directly where available"""
+        if not hasattr(os, 'statvfs'):
+            usage = psutil.disk_usage(mountpoint)
+            return {
+                'total': usage.total,
+                'used': usage.used,
+                'free': usage.free,
+                'percent': usage.percent
+            }
+        
+        # Same definitions as psutil: free is space available to unprivileged users
+        st = os.statvfs(mountpoint)
+        total = st.f_blocks * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        user_total = used + free
+        return {
+            'total': total,
+            'used': used,
+            'free': free,
+            'percent': round(used / user_total * 100, 1) if user_total else 0.0
+        }
+    
+    def _is_due(self, name: str, now: float) -> bool:
+        """Return True and schedule the next run if collector `name` is due"""
+        # Half a tick of slack so a schedule equal to the tick doesn't skip on jitter
+        if now < self._next_due.get(name, float('-inf')) - self.collection_interval / 2:
+            return False
+        self._next_due[name] = now + self.schedule[name]
+        return True
+    
+    def _collect_system_metrics(self, include_disk: bool = True) -> Dict[str, Any]:
         """Collect system metrics"""
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            cpu_freq = psutil.cpu_freq()
+            static = self._get_static_info()
             
-            # Memory metrics
-            memory = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            # CPU, memory, network I/O and load, read straight from /proc on Linux
+            if self._proc is not None:
+                cpu_percent = self._proc.cpu_percent()
+                memory, swap = self._proc.memory()
+                network_io = self._proc.net_io()
+                load_avg = self._proc.load_average()
+            else:
+                cpu_percent = psutil.cpu_percent(interval=None)
+                
+                vm = psutil.virtual_memory()
+                memory = {
+                    'total': vm.total,
+                    'available': vm.available,
+                    'used': vm.used,
+                    'free': vm.free,
+                    'percent': vm.percent
+                }
+                sm = psutil.swap_memory()
+                swap = {
+                    'total': sm.total,
+                    'used': sm.used,
+                    'free': sm.free,
+                    'percent': sm.percent
+                }
+                
+                net = psutil.net_io_counters()
+                network_io = {
+                    'bytes_sent': net.bytes_sent,
+                    'bytes_recv': net.bytes_recv,
+                    'packets_sent': net.packets_sent,
+                    'packets_recv': net.packets_recv
+                }
+                
+                if hasattr(psutil, 'getloadavg'):
+                    load_avg = list(psutil.getloadavg())
+                else:
+                    load_avg = [0, 0, 0]
             
-            # Disk metrics
-            disk_partitions = psutil.disk_partitions()
-            disk_usage = {}
-            for partition in disk_partitions:
-                try:
-                    usage = psutil.disk_usage(partition.mountpoint)
-                    disk_usage[partition.mountpoint] = {
-                        'total': usage.total,
-                        'used': usage.used,
-                        'free': usage.free,
-                        'percent': usage.percent
-                    }
-                except (PermissionError, OSError):
-                    continue
+            cpu_freq = psutil.cpu_freq()
             
-            # Network metrics
-            network_io = psutil.net_io_counters()
-            network_connections = len(psutil.net_connections())
+            # Disk metrics (on their own, slower schedule)
+            disk_usage = {}
+            if include_disk:
+                for partition in static['partitions']:
+                    try:
+                        disk_usage[partition.mountpoint] = self._disk_usage(partition.mountpoint)
+                    except (PermissionError, OSError):
+                        continue
             
-            # System load
-            if hasattr(psutil, 'getloadavg'):
-                load_avg = psutil.getloadavg()
-            else:
-                load_avg = [0, 0, 0]
+            # Network connections
+            network_connections = self._count_connections()
             
             # Boot time and uptime
-            boot_time = psutil.boot_time()
+            boot_time = static['boot_time']
             uptime = time.time() - boot_time
             
             # Process metrics
             process_count = len(psutil.pids())
             
+            # Agent process footprint, read in a single /proc pass
+            with self._process.oneshot():
+                agent_process = {
+                    'cpu_percent': self._process.cpu_percent(interval=None),
+                    'memory_rss': self._process.memory_info().rss,
+                    'num_threads': self._process.num_threads()
+                }
+            
             metrics = {
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': self._cycle_ts,
                 'agent_id': self.agent_id,
                 'hostname': self.hostname,
                 'platform': self.platform,
                 'system': {
                     'uptime': uptime,
                     'boot_time': boot_time,
-                    'load_average': list(load_avg),
-                    'process_count': process_count
+                    'load_average': load_avg,
+                    'process_count': process_count,
+                    'agent_process': agent_process
                 },
                 'cpu': {
                     'usage_percent': cpu_percent,
-                    'count': cpu_count,
+                    'count': static['cpu_count'],
                     'frequency': {
                         'current': cpu_freq.current if cpu_freq else None,
-                        'min': cpu_freq.min if cpu_freq else None,
-                        'max': cpu_freq.max if cpu_freq else None
+                        'min': static['cpu_freq_min'],
+                        'max': static['cpu_freq_max']
                     }
                 },
                 'memory': {
-                    'virtual': {
-                        'total': memory.total,
-                        'available': memory.available,
-                        'used': memory.used,
-                        'free': memory.free,
-                        'percent': memory.percent
-                    },
-                    'swap': {
-                        'total': swap.total,
-                        'used': swap.used,
-                        'free': swap.free,
-                        'percent': swap.percent
-                    }
+                    'virtual': memory,
+                    'swap': swap
                 },
-                'disk': disk_usage,
                 'network': {
-                    'bytes_sent': network_io.bytes_sent,
-                    'bytes_recv': network_io.bytes_recv,
-                    'packets_sent': network_io.packets_sent,
-                    'packets_recv': network_io.packets_recv,
+                    **network_io,
                     'connections_count': network_connections
                 }
             }
+            if include_disk:
+                metrics['disk'] = disk_usage
             
             return metrics
             
@@ -166,16 +496,38 @@ class NOCBRAINAgent:
             print(f"Error collecting system metrics: {e}")
             return {}
     
-    def _collect_application_metrics(self) -> Dict[str, Any]:
+    async def _collect_application_metrics(self) -> Dict[str, Any]:
         """Collect application-specific metrics"""
         try:
+            # Only probe services that answered recently or whose backoff has expired
+            probe_names = []
+            for name in self._app_probes:
+                if self._probe_skip[name] > 0:
+                    self._probe_skip[name] -= 1
+                else:
+                    probe_names.append(name)
+            
+            # The HTTP status probes use the blocking requests session; run them in parallel threads
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self._app_probes[name]) for name in probe_names)
+            )
+            
+            probe_stats = {name: {} for name in self._app_probes}
+            for name, stats in zip(probe_names, results):
+                if stats is None:
+                    self._probe_backoff[name] = min(max(1, self._probe_backoff[name] * 2), MAX_PROBE_BACKOFF)
+                    self._probe_skip[name] = self._probe_backoff[name]
+                else:
+                    self._probe_backoff[name] = 0
+                    probe_stats[name] = stats
+            
             app_metrics = {
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': self._cycle_ts,
                 'agent_id': self.agent_id,
                 'hostname': self.hostname,
                 'applications': {
-                    'nginx': self._get_nginx_stats(),
-                    'apache': self._get_apache_stats(),
+                    'nginx': probe_stats['nginx'],
+                    'apache': probe_stats['apache'],
                     'mysql': self._get_mysql_stats(),
                     'postgresql': self._get_postgresql_stats(),
                     'redis': self._get_redis_stats(),
@@ -187,8 +539,8 @@ class NOCBRAINAgent:
             print(f"Error collecting application metrics: {e}")
             return {}
     
-    def _get_nginx_stats(self) -> Dict[str, Any]:
-        """Collect Nginx statistics"""
+    def _get_nginx_stats(self) -> Optional[Dict[str, Any]]:
+        """Collect Nginx statistics, or None if the status page is unreachable"""
         try:
             # Try to get stats from nginx stub_status
             response = self.session.get('http://localhost/nginx_status', timeout=5)
@@ -203,10 +555,10 @@ class NOCBRAINAgent:
                 return stats
         except:
             pass
-        return {}
+        return None
     
-    def _get_apache_stats(self) -> Dict[str, Any]:
-        """Collect Apache statistics"""
+    def _get_apache_stats(self) -> Optional[Dict[str, Any]]:
+        """Collect Apache statistics, or None if the status page is unreachable"""
         try:
             # Try to get stats from Apache server-status
             response = self.session.get('http://localhost/server-status?auto', timeout=5)
@@ -220,7 +572,7 @@ class NOCBRAINAgent:
                 return stats
         except:
             pass
-        return {}
+        return None
     
     def _get_mysql_stats(self) -> Dict[str, Any]:
         """Collect MySQL statistics"""
@@ -276,64 +628,102 @@ class NOCBRAINAgent:
         except:
             return {}
     
-    def send_metrics(self, metrics: Dict[str, Any]) -> bool:
+    async def send_metrics(self, metrics: Dict[str, Any]) -> bool:
         """Send metrics to server"""
         try:
-            encrypted_data = self._encrypt_data(metrics)
-            
-            payload = {
-                'data': encrypted_data,
-                'agent_id': self.agent_id,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            body, headers = await self._prepare_body(metrics)
             
-            response = self.session.post(
-                f"{self.server_url}/api/v1/monitoring/metrics",
-                json=payload,
-                timeout=30,
-                verify=self.ssl_context
-            )
-            
-            if response.status_code == 200:
-                print(f"Metrics sent successfully for agent {self.agent_id}")
-                return True
-            else:
-                print(f"Failed to send metrics: {response.status_code} - {response.text}")
-                return False
+            async with self._get_session().post(
+                self._metrics_url,
+                data=body,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 200:
+                    print(f"Metrics sent successfully for agent {self.agent_id}")
+                    return True
+                else:
+                    print(f"Failed to send metrics: {response.status} - {await response.text()}")
+                    return False
                 
         except Exception as e:
             print(f"Error sending metrics: {e}")
             return False
     
-    def send_heartbeat(self) -> bool:
+    def _build_heartbeat(self) -> Dict[str, Any]:
+        """Build heartbeat payload"""
+        return {
+            'agent_id': self.agent_id,
+            'hostname': self.hostname,
+            'platform': self.platform,
+            'timestamp': self._cycle_ts,
+            'status': 'online',
+            'version': '1.0.0'
+        }
+    
+    async def send_heartbeat(self) -> bool:
         """Send heartbeat to server"""
         try:
-            heartbeat_data = {
-                'agent_id': self.agent_id,
-                'hostname': self.hostname,
-                'platform': self.platform,
-                'timestamp': datetime.utcnow().isoformat(),
-                'status': 'online',
-                'version': '1.0.0'
-            }
+            heartbeat_data = self._build_heartbeat()
             
-            response = self.session.post(
-                f"{self.server_url}/api/v1/monitoring/heartbeat",
-                json=heartbeat_data,
-                timeout=10,
-                verify=self.ssl_context
-            )
-            
-            if response.status_code == 200:
-                return True
-            else:
-                print(f"Failed to send heartbeat: {response.status_code}")
-                return False
+            async with self._get_session().post(
+                self._heartbeat_url,
+                data=dumps_json(heartbeat_data),
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    return True
+                else:
+                    print(f"Failed to send heartbeat: {response.status}")
+                    return False
                 
         except Exception as e:
             print(f"Error sending heartbeat: {e}")
             return False
     
+    async def send_bundle(self, system_metrics: Dict[str, Any], app_metrics: Dict[str, Any]) -> bool:
+        """Send system metrics, application metrics and heartbeat in a single request"""
+        if self.bundle_supported:
+            try:
+                bundle = {
+                    'agent_id': self.agent_id,
+                    'timestamp': self._cycle_ts,
+                    'system': system_metrics,
+                    'apps': app_metrics,
+                    'heartbeat': self._build_heartbeat()
+                }
+                
+                body, headers = await self._prepare_body(bundle)
+                
+                async with self._get_session().post(
+                    self._bundle_url,
+                    data=body,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    if response.status == 200:
+                        print(f"Metrics bundle sent successfully for agent {self.agent_id}")
+                        return True
+                    elif response.status in (404, 405):
+                        print("Server does not support metric bundles, falling back to separate requests")
+                        self.bundle_supported = False
+                    else:
+                        print(f"Failed to send metrics bundle: {response.status} - {await response.text()}")
+                        return False
+                    
+            except Exception as e:
+                print(f"Error sending metrics bundle: {e}")
+                return False
+        
+        # Fallback: overlap the three legacy posts on the same keep-alive connection pool
+        sends = [self.send_heartbeat()]
+        if system_metrics:
+            sends.append(self.send_metrics(system_metrics))
+        if app_metrics:
+            sends.append(self.send_metrics(app_metrics))
+        results = await asyncio.gather(*sends)
+        return all(results)
+    
     async def run_collection_cycle(self):
         """Main collection cycle"""
         print(f"Starting NOCbRAIN agent {self.agent_id}")
@@ -344,28 +734,43 @@ class NOCBRAINAgent:
         self.is_running = True
         
         # Send initial heartbeat
-        self.send_heartbeat()
+        self._cycle_ts = datetime.utcnow().isoformat()
+        await self.send_heartbeat()
         
+        # Give the primed CPU counters a non-zero window before the first sample
+        await asyncio.sleep(0.1)
+        
+        # Absolute monotonic deadlines keep cycles aligned regardless of wall-clock changes
+        deadline = time.monotonic()
         while self.is_running:
+            deadline += self.collection_interval
             try:
-                start_time = time.time()
+                now = time.monotonic()
+                self._cycle_ts = datetime.utcnow().isoformat()
                 
                 # Collect system metrics
-                system_metrics = self._collect_system_metrics()
-                if system_metrics:
-                    self.send_metrics(system_metrics)
+                system_metrics = {}
+                if self._is_due('system', now):
+                    system_metrics = self._collect_system_metrics(
+                        include_disk=self._is_due('disk', now)
+                    )
                 
                 # Collect application metrics
-                app_metrics = self._collect_application_metrics()
-                if app_metrics:
-                    self.send_metrics(app_metrics)
+                app_metrics = {}
+                if self._is_due('app', now):
+                    app_metrics = await self._collect_application_metrics()
                 
-                # Send heartbeat
-                self.send_heartbeat()
+                # Send metrics and heartbeat in one request
+                await self.send_bundle(system_metrics, app_metrics)
                 
-                # Calculate sleep time
-                collection_time = time.time() - start_time
-                sleep_time = max(0, self.collection_interval - collection_time)
+                # Sleep until the next deadline; if the cycle overran, skip the missed slots
+                finished = time.monotonic()
+                collection_time = finished - now
+                if finished < deadline:
+                    sleep_time = deadline - finished
+                else:
+                    sleep_time = 0
+                    deadline = finished
                 
                 print(f"Collection cycle completed in {collection_time:.2f}s, sleeping for {sleep_time:.2f}s")
                 await asyncio.sleep(sleep_time)
@@ -377,6 +782,9 @@ class NOCBRAINAgent:
             except Exception as e:
                 print(f"Error in collection cycle: {e}")
                 await asyncio.sleep(10)
+                deadline = time.monotonic()
+        
+        await self.close()
     
     def stop(self):
         """Stop the agent"""
@@ -387,7 +795,9 @@ class NOCBRAINAgent:
 def load_config(config_file: str) -> Dict[str, Any]:
     """Load configuration from file"""
     try:
-        with open(config_file, 'r') as f:
+        with open(config_file, 'rb') as f:
+            if orjson is not None:
+                return orjson.loads(f.read())
             return json.load(f)
     except FileNotFoundError:
         print(f"Configuration file {config_file} not found")
@@ -400,8 +810,11 @@ def load_config(config_file: str) -> Dict[str, Any]:
 def save_config(config: Dict[str, Any], config_file: str):
     """Save configuration to file"""
     try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_file, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(config, indent=2).encode())
         print(f"Configuration saved to {config_file}")
     except Exception as e:
         print(f"Error saving configuration: {e}")
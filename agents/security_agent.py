@@ -5,20 +5,150 @@ Real-time security monitoring and threat detection
 """
 
 import asyncio
+import functools
 import json
 import logging
-import re
+import os
+import socket
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from collections import defaultdict, deque
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Union
+from dataclasses import asdict, dataclass, is_dataclass
+from collections import Counter, defaultdict, deque
 import hashlib
-import requests
+import aiofiles
+import aiohttp
+
+try:
+    # The regex module can release the GIL while matching, letting scan
+    # batches run in parallel on the executor threads
+    import regex as re
+    REGEX_SEARCH_KWARGS = {'concurrent': True}
+except ImportError:
+    import re
+    REGEX_SEARCH_KWARGS = {}
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sliding detection windows in seconds
+BRUTE_FORCE_WINDOW = 300.0
+PORT_SCAN_WINDOW = 60.0
+
+# Number of log lines handed to a scan worker at once
+SCAN_BATCH_SIZE = 256
+
+# Below this many URLs the per-URL prescreen beats NumPy's setup cost
+VECTOR_PRESCREEN_MIN = 32
+
+# Log tailing: bytes per read, idle poll interval and reopen delay
+TAIL_READ_SIZE = 65536
+TAIL_IDLE_DELAY = 0.2
+TAIL_RETRY_DELAY = 5.0
+
+# Outbound event buffer: capacity, sender tasks and events per POST
+EVENT_QUEUE_SIZE = 10_000
+EVENT_SENDERS = 4
+EVENT_BATCH_SIZE = 64
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+
+# Sample entries processed when no log sources are configured
+SAMPLE_LOGS = [
+    '192.168.1.100 - - [14/Feb/2026:10:30:00 +0000] "GET /admin/login HTTP/1.1" 401',
+    '192.168.1.100 - - [14/Feb/2026:10:30:01 +0000] "POST /admin/login HTTP/1.1" 401',
+    '192.168.1.100 - - [14/Feb/2026:10:30:02 +0000] "POST /admin/login HTTP/1.1" 401',
+    '192.168.1.100 - - [14/Feb/2026:10:30:03 +0000] "POST /admin/login HTTP/1.1" 401',
+    '192.168.1.100 - - [14/Feb/2026:10:30:04 +0000] "POST /admin/login HTTP/1.1" 401',
+    '192.168.1.101 - - [14/Feb/2026:10:30:05 +0000] "GET /search?q=union+select+*+from+users HTTP/1.1" 200',
+]
+
+# Common log formats, matched from the start of the line and ordered by
+# expected frequency so the common case exits early
+LOG_FORMAT_PATTERNS = [
+    # Apache/Nginx access log
+    r'(?P<ip>\d+\.\d+\.\d+\.\d+).*?\[(?P<timestamp>.*?)\].*?"(?P<method>\w+)\s+(?P<url>[^"]+).*?"\s*(?P<status>\d+)',
+    # SSH auth log
+    r'(?P<timestamp>\w+\s+\d+\s+\d+:\d+:\d+).*?sshd.*?from\s+(?P<ip>\d+\.\d+\.\d+\.\d+)',
+    # Firewall log
+    r'(?P<timestamp>\w+\s+\d+\s+\d+:\d+:\d+).*?SRC=(?P<ip>\d+\.\d+\.\d+\.\d+).*?DST=(?P<dest>\d+\.\d+\.\d+\.\d+).*?PROTO=(?P<protocol>\w+)',
+]
+
+# Compiled patterns shared by every agent in the process
+_REGEX_CACHE: Dict[Tuple[str, int], re.Pattern] = {}
+_REGEX_LOCK = threading.Lock()
+
+def _get_re(pattern: str, flags: int = re.IGNORECASE) -> re.Pattern:
+    """Return a compiled pattern from the process-wide cache"""
+    key = (pattern, flags)
+    compiled = _REGEX_CACHE.get(key)
+    if compiled is None:
+        with _REGEX_LOCK:
+            compiled = _REGEX_CACHE.get(key)
+            if compiled is None:
+                compiled = _REGEX_CACHE[key] = re.compile(pattern, flags)
+    return compiled
+
+# Supported log formats, compiled once for the ingest hot path
+_COMPILED_LOG_FORMATS = tuple(_get_re(pattern) for pattern in LOG_FORMAT_PATTERNS)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_log_entry_cached(log_line: str) -> Optional[Dict[str, Any]]:
+    """Match a log line against the known log formats
+    
+    Results are shared between repeated lines, so callers must treat the
+    returned dict as read-only.
+    """
+    for pattern in _COMPILED_LOG_FORMATS:
+        match = pattern.match(log_line, **REGEX_SEARCH_KWARGS)
+        if match:
+            return match.groupdict()
+    return None
+
+@functools.lru_cache(maxsize=65536)
+def _ip_key(ip: str) -> Union[int, str]:
+    """Key for per-IP state: IPv4 packed into an int, anything else as-is"""
+    try:
+        return int.from_bytes(socket.inet_aton(ip), 'big')
+    except OSError:
+        return ip
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        # orjson serializes dataclasses such as SecurityEvent natively
+        return orjson.dumps(data)
+    return json.dumps(data, default=_json_default).encode()
+
+def _json_default(obj: Any) -> Any:
+    """Serialize dataclasses for the stdlib json fallback"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 @dataclass
 class SecurityEvent:
     """Security event data structure"""
@@ -32,6 +162,75 @@ class SecurityEvent:
     confidence: float
     metadata: Dict[str, Any]
 
+class EventBuffer:
+    """Columnar FIFO of security events waiting to be sent
+    
+    Numeric fields are packed into typed arrays and enum-like strings are
+    dictionary-encoded, so queued events cost a few dozen bytes each
+    instead of a dataclass instance and its attribute objects.
+    """
+    
+    def __init__(self):
+        self._etype_names: List[str] = []
+        self._etype_ids: Dict[str, int] = {}
+        self._severity_ids = {name: i for i, name in enumerate(SEVERITIES)}
+        self.ts = array('d')
+        self.ip = array('I')
+        self.etype = array('B')
+        self.severity = array('B')
+        self.conf = array('f')
+        # target, description, raw_log, metadata, analysis and non-IPv4 source per event
+        self.extra: List[Tuple[str, str, str, Dict[str, Any], Dict[str, Any], Optional[str]]] = []
+    
+    def __len__(self) -> int:
+        return len(self.ts)
+    
+    def append(self, event: SecurityEvent, analysis: Dict[str, Any], ts: float):
+        """Add an event to the end of the buffer"""
+        etype_id = self._etype_ids.get(event.event_type)
+        if etype_id is None:
+            etype_id = self._etype_ids[event.event_type] = len(self._etype_names)
+            self._etype_names.append(event.event_type)
+        
+        try:
+            ip_int = int.from_bytes(socket.inet_aton(event.source_ip), 'big')
+            ip_fallback = None
+        except OSError:
+            ip_int = 0
+            ip_fallback = event.source_ip
+        
+        self.ts.append(ts)
+        self.ip.append(ip_int)
+        self.etype.append(etype_id)
+        self.severity.append(self._severity_ids.get(event.severity, 1))
+        self.conf.append(event.confidence)
+        self.extra.append((event.target, event.description, event.raw_log, event.metadata, analysis, ip_fallback))
+    
+    def take(self, limit: int, format_ts) -> List[Tuple[SecurityEvent, Dict[str, Any]]]:
+        """Materialize and remove up to `limit` of the oldest events"""
+        count = min(limit, len(self.ts))
+        items = []
+        for row in range(count):
+            target, description, raw_log, metadata, analysis, ip = self.extra[row]
+            if ip is None:
+                ip = socket.inet_ntoa(self.ip[row].to_bytes(4, 'big'))
+            event = SecurityEvent(
+                timestamp=format_ts(self.ts[row]),
+                event_type=self._etype_names[self.etype[row]],
+                severity=SEVERITIES[self.severity[row]],
+                source_ip=ip,
+                target=target,
+                description=description,
+                raw_log=raw_log,
+                confidence=round(self.conf[row], 4),
+                metadata=metadata
+            )
+            items.append((event, analysis))
+        
+        for column in (self.ts, self.ip, self.etype, self.severity, self.conf, self.extra):
+            del column[:count]
+        return items
+
 class SecurityAgent:
     """Main security agent class"""
     
@@ -39,24 +238,60 @@ class SecurityAgent:
         self.config = config
         self.api_endpoint = config.get('api_endpoint', 'http://localhost:8000/api/v1')
         self.agent_id = config.get('agent_id', 'security-agent-001')
+        # Bearer token for the API; event batches need the security:analyze permission
+        self.api_key = config.get('api_key')
         self.log_sources = config.get('log_sources', [])
+        self._tail_frag: Dict[str, str] = {}
         self.thresholds = config.get('thresholds', {})
         
-        # Security tracking
+        # Security tracking, keyed by _ip_key(ip)
         self.failed_logins = defaultdict(lambda: deque(maxlen=50))
         self.suspicious_ips = defaultdict(int)
-        self.port_scan_attempts = defaultdict(list)
+        self.port_scan_attempts = defaultdict(deque)
+        self.port_scan_counts = defaultdict(Counter)
         self.known_malicious_ips = set()
+        self._malicious_bloom = None
+        if ScalableBloomFilter is not None:
+            self._malicious_bloom = ScalableBloomFilter(
+                initial_capacity=1_000_000,
+                error_rate=0.001
+            )
+        
+        # Last formatted second, shared by the scan workers as one tuple
+        self._iso_cache = (0, '')
+        
+        # API client state
+        self._events_url = f"{self.api_endpoint}/security/events"
+        self._batch_url = f"{self._events_url}/batch"
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._outbuf = EventBuffer()
+        # Set while events are buffered, and once every taken batch has been posted
+        self._events_ready = asyncio.Event()
+        self._events_drained = asyncio.Event()
+        self._events_drained.set()
+        self._in_flight = 0
+        self._sender_tasks: List[asyncio.Task] = []
+        
+        # Pattern matching runs off the event loop in worker threads
+        self._exec = ThreadPoolExecutor(max_workers=os.cpu_count())
         
         # Load threat intelligence
         self.load_threat_intelligence()
         
+        # Precompute the analysis for every known event type and severity
+        event_types = ['brute_force', 'port_scan', *self.attack_patterns]
+        self._analysis_table: Dict[Tuple[str, str], Dict[str, Any]] = {
+            (event_type, severity): self._build_analysis(event_type, severity)
+            for event_type in event_types
+            for severity in SEVERITIES
+        }
+        
         logger.info(f"Security Agent {self.agent_id} initialized")
     
     def load_threat_intelligence(self):
         """Load known malicious IPs and threat patterns"""
         # Sample threat intelligence (in production, load from external feeds)
-        self.known_malicious_ips.update([
+        self.add_malicious_ips([
             '192.168.1.100',  # Example malicious IP
             '10.0.0.50',      # Example malicious IP
         ])
@@ -92,58 +327,198 @@ class SecurityAgent:
             ]
         }
         
+        # Substrings at least one of which every pattern in the category
+        # requires, checked against the lowercased URL before any regex runs
+        self._attack_literals_by_type = {
+            'sql_injection': ('union', 'or', 'drop', 'insert', 'delete'),
+            'xss': ('<script', 'javascript:', 'onload', 'onerror'),
+            'command_injection': (';', '`', '$(', '&&'),
+            'path_traversal': ('../', '..\\', '%2e%2e')
+        }
+        
+        # One alternation per category; the named group that matched
+        # identifies which pattern fired
+        self._combined_patterns: Dict[str, re.Pattern] = {}
+        self._combined_group_patterns: Dict[str, str] = {}
+        for attack_type, patterns in self.attack_patterns.items():
+            alternatives = []
+            for i, pattern in enumerate(patterns):
+                group = f'{attack_type}_{i}'
+                self._combined_group_patterns[group] = pattern
+                alternatives.append(f'(?P<{group}>{pattern})')
+            self._combined_patterns[attack_type] = _get_re('|'.join(alternatives))
+        
+        self._build_hyperscan_db()
+        
         logger.info(f"Loaded {len(self.known_malicious_ips)} malicious IPs")
     
-    async def parse_log_entry(self, log_line: str) -> Optional[Dict[str, Any]]:
-        """Parse a log entry and extract relevant information"""
+    def _iso_at(self, ts: float) -> str:
+        """Format an epoch timestamp as ISO-8601, memoized per second"""
+        sec = int(ts)
+        cached_sec, cached_str = self._iso_cache
+        if sec != cached_sec:
+            cached_str = datetime.utcfromtimestamp(sec).isoformat()
+            self._iso_cache = (sec, cached_str)
+        return cached_str
+    
+    def _iso_now(self) -> str:
+        """Current UTC time as ISO-8601 at second resolution"""
+        return self._iso_at(time.time())
+    
+    def add_malicious_ips(self, ips: List[str]):
+        """Add IPs from a threat feed to the malicious IP set"""
+        for ip in ips:
+            key = _ip_key(ip)
+            if self._malicious_bloom is not None:
+                self._malicious_bloom.add(key)
+            self.known_malicious_ips.add(key)
+    
+    def is_known_malicious(self, ip: str) -> bool:
+        """Check an IP against threat intelligence"""
+        # The bloom filter rejects almost every clean IP without touching the set
+        key = _ip_key(ip)
+        if self._malicious_bloom is not None and key not in self._malicious_bloom:
+            return False
+        return key in self.known_malicious_ips
+    
+    def _build_hyperscan_db(self):
+        """Compile all attack patterns into a single Hyperscan database"""
+        self._hs_db = None
+        self._hs_local = threading.local()
+        self._hs_id_to_attack: Dict[int, Tuple[str, str]] = {}
+        
+        if hyperscan is None:
+            return
+        
         try:
-            # Common log formats
-            patterns = [
-                # Apache/Nginx access log
-                r'(?P<ip>\d+\.\d+\.\d+\.\d+).*?\[(?P<timestamp>.*?)\].*?"(?P<method>\w+)\s+(?P<url>[^"]+).*?"(?P<status>\d+)',
-                # SSH auth log
-                r'(?P<timestamp>\w+\s+\d+\s+\d+:\d+:\d+).*?sshd.*?from\s+(?P<ip>\d+\.\d+\.\d+\.\d+)',
-                # Firewall log
-                r'(?P<timestamp>\w+\s+\d+\s+\d+:\d+:\d+).*?SRC=(?P<ip>\d+\.\d+\.\d+\.\d+).*?DST=(?P<dest>\d+\.\d+\.\d+\.\d+).*?PROTO=(?P<protocol>\w+)',
-            ]
+            expressions = []
+            for attack_type, patterns in self.attack_patterns.items():
+                for pattern in patterns:
+                    self._hs_id_to_attack[len(expressions)] = (attack_type, pattern)
+                    expressions.append(pattern.encode())
             
-            for pattern in patterns:
-                match = re.search(pattern, log_line, re.IGNORECASE)
-                if match:
-                    return match.groupdict()
+            flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+            db = hyperscan.Database()
+            db.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                flags=[flags] * len(expressions)
+            )
+            self._hs_db = db
+            logger.info(f"Hyperscan database compiled with {len(expressions)} patterns")
             
-            return None
+        except Exception as e:
+            logger.warning(f"Hyperscan unavailable, using re fallback: {e}")
+            self._hs_db = None
+    
+    def _candidate_types(self, url: str) -> List[str]:
+        """Attack categories whose required literals appear in the URL"""
+        url_lc = url.lower()
+        return [
+            attack_type
+            for attack_type, literals in self._attack_literals_by_type.items()
+            if any(literal in url_lc for literal in literals)
+        ]
+    
+    def _prescreen_urls(self, urls: List[str]) -> List[List[str]]:
+        """Run the literal prescreen over a batch of URLs"""
+        if np is None or len(urls) < VECTOR_PRESCREEN_MIN:
+            return [self._candidate_types(url) for url in urls]
+        
+        # One C loop per literal across the whole batch
+        urls_lc = np.char.lower(np.array(urls, dtype=str))
+        candidates: List[List[str]] = [[] for _ in urls]
+        for attack_type, literals in self._attack_literals_by_type.items():
+            hits = np.zeros(len(urls), dtype=bool)
+            for literal in literals:
+                hits |= np.char.find(urls_lc, literal) >= 0
+            for i in np.flatnonzero(hits):
+                candidates[i].append(attack_type)
+        return candidates
+    
+    def _match_attack_patterns(self, url: str, candidate_types: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """Return the first matching (attack_type, pattern) pair per category"""
+        if candidate_types is None:
+            candidate_types = self._candidate_types(url)
+        if not candidate_types:
+            return []
+        
+        if self._hs_db is not None:
+            matched_ids = set()
+            
+            def on_match(pattern_id, start, end, flags, context):
+                matched_ids.add(pattern_id)
+            
+            # Scratch space is not thread-safe, so each worker keeps its own
+            scratch = getattr(self._hs_local, 'scratch', None)
+            if scratch is None:
+                scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
             
+            self._hs_db.scan(
+                url.encode('utf-8', 'surrogateescape'),
+                match_event_handler=on_match,
+                scratch=scratch
+            )
+            # Report one match per category, as the regex path does
+            matches = {}
+            for pattern_id in sorted(matched_ids):
+                attack_type, pattern = self._hs_id_to_attack[pattern_id]
+                matches.setdefault(attack_type, pattern)
+            return list(matches.items())
+        
+        matches = []
+        for attack_type in candidate_types:
+            match = self._combined_patterns[attack_type].search(url, **REGEX_SEARCH_KWARGS)
+            if match:
+                matches.append((attack_type, self._combined_group_patterns[match.lastgroup]))
+        return matches
+    
+    def parse_log_entry(self, log_line: str) -> Optional[Dict[str, Any]]:
+        """Parse a log entry and extract relevant information"""
+        try:
+            return _parse_log_entry_cached(log_line)
         except Exception as e:
             logger.error(f"Error parsing log entry: {e}")
             return None
     
-    def detect_brute_force(self, ip: str, timestamp: str) -> Optional[SecurityEvent]:
+    def _scan_batch(self, lines: List[str]) -> List[Tuple[str, Dict[str, Any], List[SecurityEvent]]]:
+        """Parse lines and run the stateless web attack checks in a worker thread"""
+        parsed = []
+        for log_line in lines:
+            log_data = self.parse_log_entry(log_line)
+            if log_data:
+                parsed.append((log_line, log_data))
+        
+        candidates = self._prescreen_urls([log_data.get('url', '') for _, log_data in parsed])
+        
+        return [
+            (log_line, log_data, self.detect_web_attack(log_data, log_line, candidate_types))
+            for (log_line, log_data), candidate_types in zip(parsed, candidates)
+        ]
+    
+    def detect_brute_force(self, ip: str, now: float) -> Optional[SecurityEvent]:
         """Detect brute force attacks"""
         try:
-            current_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
-            # Add to failed logins
-            self.failed_logins[ip].append(current_time)
+            # Add to failed logins and evict attempts outside the window
+            attempts = self.failed_logins[_ip_key(ip)]
+            attempts.append(now)
+            cutoff = now - BRUTE_FORCE_WINDOW
+            while attempts and attempts[0] < cutoff:
+                attempts.popleft()
             
             # Check for multiple failed attempts in short time
-            recent_attempts = [
-                t for t in self.failed_logins[ip] 
-                if current_time - t < timedelta(minutes=5)
-            ]
-            
-            if len(recent_attempts) >= self.thresholds.get('failed_login_threshold', 5):
+            if len(attempts) >= self.thresholds.get('failed_login_threshold', 5):
                 return SecurityEvent(
-                    timestamp=timestamp,
+                    timestamp=self._iso_at(now),
                     event_type='brute_force',
                     severity='high',
                     source_ip=ip,
                     target='ssh',
                     description=f'Brute force attack detected from {ip}',
                     raw_log='',
-                    confidence=min(1.0, len(recent_attempts) / 10.0),
+                    confidence=min(1.0, len(attempts) / 10.0),
                     metadata={
-                        'attempts': len(recent_attempts),
+                        'attempts': len(attempts),
                         'time_window': '5 minutes'
                     }
                 )
@@ -154,26 +529,30 @@ class SecurityAgent:
             logger.error(f"Error detecting brute force: {e}")
             return None
     
-    def detect_port_scan(self, ip: str, port: int, timestamp: str) -> Optional[SecurityEvent]:
+    def detect_port_scan(self, ip: str, port: int, now: float) -> Optional[SecurityEvent]:
         """Detect port scanning attempts"""
         try:
-            current_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
             # Track port access attempts
-            self.port_scan_attempts[ip].append((port, current_time))
+            ip_k = _ip_key(ip)
+            attempts = self.port_scan_attempts[ip_k]
+            port_counts = self.port_scan_counts[ip_k]
+            attempts.append((port, now))
+            port_counts[port] += 1
             
             # Clean old attempts
-            self.port_scan_attempts[ip] = [
-                (p, t) for p, t in self.port_scan_attempts[ip]
-                if current_time - t < timedelta(minutes=1)
-            ]
+            cutoff = now - PORT_SCAN_WINDOW
+            while attempts and attempts[0][1] < cutoff:
+                old_port, _ = attempts.popleft()
+                port_counts[old_port] -= 1
+                if not port_counts[old_port]:
+                    del port_counts[old_port]
             
             # Check for multiple port accesses
-            unique_ports = len(set(p for p, _ in self.port_scan_attempts[ip]))
+            unique_ports = len(port_counts)
             
             if unique_ports >= self.thresholds.get('port_scan_threshold', 10):
                 return SecurityEvent(
-                    timestamp=timestamp,
+                    timestamp=self._iso_at(now),
                     event_type='port_scan',
                     severity='medium',
                     source_ip=ip,
@@ -193,7 +572,8 @@ class SecurityAgent:
             logger.error(f"Error detecting port scan: {e}")
             return None
     
-    def detect_web_attack(self, log_data: Dict[str, Any], log_line: str) -> List[SecurityEvent]:
+    def detect_web_attack(self, log_data: Dict[str, Any], log_line: str,
+                          candidate_types: Optional[List[str]] = None) -> List[SecurityEvent]:
         """Detect web-based attacks"""
         events = []
         
@@ -201,30 +581,28 @@ class SecurityAgent:
             url = log_data.get('url', '')
             method = log_data.get('method', '')
             ip = log_data.get('ip', '')
-            timestamp = datetime.utcnow().isoformat()
+            timestamp = self._iso_now()
             
             # Check for various attack patterns
-            for attack_type, patterns in self.attack_patterns.items():
-                for pattern in patterns:
-                    if re.search(pattern, url, re.IGNORECASE):
-                        severity = 'high' if attack_type in ['sql_injection', 'command_injection'] else 'medium'
-                        
-                        event = SecurityEvent(
-                            timestamp=timestamp,
-                            event_type=attack_type,
-                            severity=severity,
-                            source_ip=ip,
-                            target=url,
-                            description=f'{attack_type.replace("_", " ").title()} attempt detected',
-                            raw_log=log_line,
-                            confidence=0.8,
-                            metadata={
-                                'method': method,
-                                'pattern_matched': pattern,
-                                'attack_type': attack_type
-                            }
-                        )
-                        events.append(event)
+            for attack_type, pattern in self._match_attack_patterns(url, candidate_types):
+                severity = 'high' if attack_type in ['sql_injection', 'command_injection'] else 'medium'
+                
+                event = SecurityEvent(
+                    timestamp=timestamp,
+                    event_type=attack_type,
+                    severity=severity,
+                    source_ip=ip,
+                    target=url,
+                    description=f'{attack_type.replace("_", " ").title()} attempt detected',
+                    raw_log=log_line,
+                    confidence=0.8,
+                    metadata={
+                        'method': method,
+                        'pattern_matched': pattern,
+                        'attack_type': attack_type
+                    }
+                )
+                events.append(event)
             
             return events
             
@@ -232,8 +610,8 @@ class SecurityAgent:
             logger.error(f"Error detecting web attack: {e}")
             return []
     
-    def analyze_with_ai(self, event: SecurityEvent) -> Dict[str, Any]:
-        """Analyze security event with AI (simplified version)"""
+    def _build_analysis(self, event_type: str, severity: str) -> Dict[str, Any]:
+        """Build the analysis for an event type and severity"""
         try:
             analysis = {
                 'threat_level': 'low',
@@ -243,21 +621,21 @@ class SecurityAgent:
             }
             
             # Determine threat level based on event
-            if event.severity == 'critical':
+            if severity == 'critical':
                 analysis['threat_level'] = 'critical'
                 analysis['recommended_actions'].extend([
                     'Block source IP immediately',
                     'Isolate affected system',
                     'Notify security team'
                 ])
-            elif event.severity == 'high':
+            elif severity == 'high':
                 analysis['threat_level'] = 'high'
                 analysis['recommended_actions'].extend([
                     'Monitor source IP closely',
                     'Review access logs',
                     'Consider temporary block'
                 ])
-            elif event.severity == 'medium':
+            elif severity == 'medium':
                 analysis['threat_level'] = 'medium'
                 analysis['recommended_actions'].extend([
                     'Log for further analysis',
@@ -265,13 +643,13 @@ class SecurityAgent:
                 ])
             
             # Add context based on event type
-            if event.event_type == 'brute_force':
+            if event_type == 'brute_force':
                 analysis['context'] = {
                     'attack_vector': 'authentication',
                     'common_targets': ['SSH', 'RDP', 'Web applications'],
                     'mitigation': 'Rate limiting, account lockout'
                 }
-            elif event.event_type == 'port_scan':
+            elif event_type == 'port_scan':
                 analysis['context'] = {
                     'attack_vector': 'reconnaissance',
                     'common_targets': 'Open ports',
@@ -284,96 +662,218 @@ class SecurityAgent:
             logger.error(f"Error in AI analysis: {e}")
             return {'threat_level': 'unknown', 'recommended_actions': [], 'context': {}}
     
-    async def send_to_api(self, event: SecurityEvent, analysis: Dict[str, Any]) -> bool:
-        """Send security event to central API"""
-        try:
+    def analyze_with_ai(self, event: SecurityEvent) -> Dict[str, Any]:
+        """Analyze security event with AI (simplified version)
+        
+        The analysis depends only on event type and severity, so it is served
+        from a precomputed table and shared between events; treat it as
+        read-only.
+        """
+        key = (event.event_type, event.severity)
+        analysis = self._analysis_table.get(key)
+        if analysis is None:
+            analysis = self._analysis_table.setdefault(key, self._build_analysis(*key))
+        return analysis
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._http is None or self._http.closed:
             headers = {
                 'Content-Type': 'application/json',
                 'X-Agent-ID': self.agent_id
             }
-            
-            data = {
-                'agent_id': self.agent_id,
-                'event': event.__dict__,
-                'analysis': analysis,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            response = requests.post(
-                f"{self.api_endpoint}/security/events",
-                json=data,
+            if self.api_key:
+                headers['Authorization'] = f'Bearer {self.api_key}'
+            self._http = aiohttp.ClientSession(
                 headers=headers,
-                timeout=10
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
             )
-            
-            if response.status_code == 200:
-                logger.debug(f"Successfully sent security event to API")
-                return True
-            else:
-                logger.warning(f"API returned status {response.status_code}")
-                return False
+        return self._http
+    
+    async def close(self):
+        """Drain queued events, stop the senders and close the HTTP session"""
+        if self._sender_tasks:
+            try:
+                await asyncio.wait_for(self._events_drained.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {len(self._outbuf)} unsent security events")
+            for task in self._sender_tasks:
+                task.cancel()
+            await asyncio.gather(*self._sender_tasks, return_exceptions=True)
+            self._sender_tasks = []
+        
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+    
+    async def _post(self, url: str, data: Any) -> bool:
+        """POST a JSON document to the API"""
+        try:
+            async with self._get_session().post(url, data=dumps_json(data)) as response:
+                if response.status == 200:
+                    logger.debug(f"Successfully sent security event to API")
+                    return True
+                else:
+                    logger.warning(f"API returned status {response.status}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Error sending event to API: {e}")
             return False
     
-    async def monitor_logs(self):
-        """Monitor log sources for security events"""
-        logger.info("Starting log monitoring")
+    async def send_to_api(self, event: SecurityEvent, analysis: Dict[str, Any]) -> bool:
+        """Send security event to central API"""
+        data = {
+            'agent_id': self.agent_id,
+            'event': event,
+            'analysis': analysis,
+            'timestamp': self._iso_now()
+        }
+        return await self._post(self._events_url, data)
+    
+    def queue_event(self, event: SecurityEvent, analysis: Dict[str, Any]):
+        """Hand an event to the background senders without waiting on the API"""
+        if len(self._outbuf) >= EVENT_QUEUE_SIZE:
+            logger.warning(f"Event buffer full, dropping {event.event_type} from {event.source_ip}")
+            return
+        self._outbuf.append(event, analysis, time.time())
+        self._events_drained.clear()
+        self._events_ready.set()
+    
+    async def _sender_loop(self):
+        """Drain the event buffer and POST whatever is ready as one batch"""
+        while True:
+            await self._events_ready.wait()
+            batch = self._outbuf.take(EVENT_BATCH_SIZE, self._iso_at)
+            if not self._outbuf:
+                self._events_ready.clear()
+            if not batch:
+                continue
+            
+            self._in_flight += 1
+            data = {
+                'agent_id': self.agent_id,
+                'events': [{'event': event, 'analysis': analysis} for event, analysis in batch],
+                'timestamp': self._iso_now()
+            }
+            try:
+                await self._post(self._batch_url, data)
+            finally:
+                self._in_flight -= 1
+                if not self._outbuf and not self._in_flight:
+                    self._events_drained.set()
+    
+    async def _process_batch(self, lines: List[str]):
+        """Scan a batch of log lines and queue any detected events"""
+        loop = asyncio.get_running_loop()
         
-        # Simulate log monitoring (in production, would read from actual log files)
-        sample_logs = [
-            '192.168.1.100 - - [14/Feb/2026:10:30:00 +0000] "GET /admin/login HTTP/1.1" 401',
-            '192.168.1.100 - - [14/Feb/2026:10:30:01 +0000] "POST /admin/login HTTP/1.1" 401',
-            '192.168.1.100 - - [14/Feb/2026:10:30:02 +0000] "POST /admin/login HTTP/1.1" 401',
-            '192.168.1.100 - - [14/Feb/2026:10:30:03 +0000] "POST /admin/login HTTP/1.1" 401',
-            '192.168.1.100 - - [14/Feb/2026:10:30:04 +0000] "POST /admin/login HTTP/1.1" 401',
-            '192.168.1.101 - - [14/Feb/2026:10:30:05 +0000] "GET /search?q=union+select+*+from+users HTTP/1.1" 200',
+        # Parse entries and check for web attacks off the event loop, submitting every
+        # chunk up front so the workers scan them in parallel
+        scans = [
+            loop.run_in_executor(self._exec, self._scan_batch, lines[offset:offset + SCAN_BATCH_SIZE])
+            for offset in range(0, len(lines), SCAN_BATCH_SIZE)
         ]
         
-        for log_line in sample_logs:
+        # Stateful detection stays on the loop and consumes the chunks in order
+        for scan in scans:
             try:
-                # Parse log entry
-                log_data = await self.parse_log_entry(log_line)
-                if not log_data:
-                    continue
-                
-                # Detect security events
-                events = []
-                
-                # Check for brute force
-                if log_data.get('status') == '401':
-                    brute_force_event = self.detect_brute_force(
-                        log_data.get('ip', ''),
-                        datetime.utcnow().isoformat()
-                    )
-                    if brute_force_event:
-                        events.append(brute_force_event)
-                
-                # Check for web attacks
-                web_events = self.detect_web_attack(log_data, log_line)
-                events.extend(web_events)
-                
-                # Process detected events
-                for event in events:
-                    # Analyze with AI
-                    analysis = self.analyze_with_ai(event)
+                scanned = await scan
+            except Exception as e:
+                logger.error(f"Error scanning log batch: {e}")
+                continue
+            
+            for log_line, log_data, web_events in scanned:
+                try:
+                    # Detect security events
+                    events = []
                     
-                    # Send to API
-                    await self.send_to_api(event, analysis)
+                    # Check for brute force
+                    if log_data.get('status') == '401':
+                        brute_force_event = self.detect_brute_force(
+                            log_data.get('ip', ''),
+                            time.time()
+                        )
+                        if brute_force_event:
+                            events.append(brute_force_event)
                     
-                    logger.info(f"Detected {event.event_type} from {event.source_ip}")
-                
-                # Small delay between processing
-                await asyncio.sleep(0.1)
+                    events.extend(web_events)
+                    
+                    # Flag events from sources listed in threat intelligence
+                    if events and self.is_known_malicious(log_data.get('ip', '')):
+                        for event in events:
+                            event.metadata['known_malicious'] = True
+                    
+                    # Process detected events
+                    for event in events:
+                        # Analyze with AI
+                        analysis = self.analyze_with_ai(event)
+                        
+                        # Queue for the background senders
+                        self.queue_event(event, analysis)
+                        
+                        logger.info(f"Detected {event.event_type} from {event.source_ip}")
+                    
+                except Exception as e:
+                    logger.error(f"Error processing log line: {e}")
+    
+    async def _tail(self, path: str):
+        """Follow a log file, processing appended lines in blocks"""
+        rotated = False
+        while True:
+            try:
+                inode = os.stat(path).st_ino
+                async with aiofiles.open(path, 'r', errors='replace') as f:
+                    # Start at the end, or read a freshly rotated file in full
+                    if not rotated:
+                        await f.seek(0, os.SEEK_END)
+                    self._tail_frag[path] = ''
+                    logger.info(f"Tailing {path}")
+                    
+                    while True:
+                        chunk = await f.read(TAIL_READ_SIZE)
+                        if chunk:
+                            lines = (self._tail_frag[path] + chunk).split('\n')
+                            self._tail_frag[path] = lines.pop()
+                            await self._process_batch(lines)
+                            continue
+                        
+                        # Idle: check for rotation
+                        await asyncio.sleep(TAIL_IDLE_DELAY)
+                        
+                        stat = os.stat(path)
+                        if stat.st_ino != inode or stat.st_size < await f.tell():
+                            logger.info(f"{path} was rotated, reopening")
+                            rotated = True
+                            break
                 
+            except FileNotFoundError:
+                rotated = True
+                await asyncio.sleep(TAIL_RETRY_DELAY)
             except Exception as e:
-                logger.error(f"Error processing log line: {e}")
+                logger.error(f"Error tailing {path}: {e}")
+                await asyncio.sleep(TAIL_RETRY_DELAY)
+    
+    async def monitor_logs(self):
+        """Monitor log sources for security events"""
+        logger.info("Starting log monitoring")
+        
+        if self.log_sources:
+            await asyncio.gather(*(self._tail(path) for path in self.log_sources))
+            return
+        
+        # No sources configured, run over the bundled sample entries
+        await self._process_batch(SAMPLE_LOGS)
     
     async def start(self):
         """Start the security agent"""
         logger.info(f"Starting security agent {self.agent_id}")
         
+        self._get_session()
+        self._sender_tasks = [
+            asyncio.create_task(self._sender_loop()) for _ in range(EVENT_SENDERS)
+        ]
+        
         try:
             await self.monitor_logs()
         except KeyboardInterrupt:
@@ -381,6 +881,8 @@ class SecurityAgent:
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
         finally:
+            await self.close()
+            self._exec.shutdown(wait=False)
             logger.info("Security agent stopped")
 
 async def main():
@@ -389,6 +891,7 @@ async def main():
     config = {
         'agent_id': 'security-agent-001',
         'api_endpoint': 'http://localhost:8000/api/v1',
+        'api_key': os.environ.get('NOCBRAIN_API_KEY'),
         'log_sources': ['/var/log/auth.log', '/var/log/nginx/access.log'],
         'thresholds': {
             'failed_login_threshold': 5,
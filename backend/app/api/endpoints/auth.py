@@ -10,7 +10,8 @@ from app.core.security import (
     create_refresh_token,
     verify_password,
     get_password_hash,
-    get_current_active_user
+    get_current_active_user,
+    user_scope_mask
 )
 from app.core.config import settings
 from app.models.user import User
@@ -43,7 +44,8 @@ async def login(
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "scopes": user_scope_mask(user)},
+        expires_delta=access_token_expires
     )
     
     # Create refresh token
@@ -86,7 +88,8 @@ async def refresh_token(
     # Create new access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "scopes": user_scope_mask(user)},
+        expires_delta=access_token_expires
     )
     
     # Create new refresh token
@@ -3,12 +3,15 @@ NOCbRAIN Core Engine API Endpoints
 Main API endpoints for RAG-powered NOC operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from hashlib import blake2b
+import asyncio
 import json
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_active_user, check_permissions
 from app.models.user import User
@@ -21,16 +24,26 @@ from app.schemas.core_engine import (
     SystemStatusResponse
 )
 from app.core.logging import get_logger
+from app.core.timestamps import utc_timestamp
+from app.core.audit import audit_queue
+from app.core.knowledge_hashes import claim_knowledge_hash, release_knowledge_hash
+from app.core.rate_limiter import rate_limiter
+from app.core.streaming import ndjson_response, wants_ndjson
+from app.middleware.tenant import get_tenant_id, is_tenant_member
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/v1/core", tags=["core-engine"])
 
+KNOWLEDGE_VERSION_KEY = "kb:version"
 
-@router.post("/analyze-log", response_model=LogAnalysisResponse)
+# Running indexing task; reindexing rewrites whole collections, so runs never overlap
+_index_task: Optional[asyncio.Task] = None
+
+
+@router.post("/analyze-log", response_model=LogAnalysisResponse, response_class=ORJSONResponse)
 async def analyze_log(
     request: LogAnalysisRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["core:analyze"]))
 ) -> Any:
@@ -45,8 +58,8 @@ async def analyze_log(
                 detail=f"Failed to process log: {result['error']}"
             )
         
-        # Build response
-        response = LogAnalysisResponse(
+        # Build response from trusted engine output, skipping validation
+        response = LogAnalysisResponse.model_construct(
             log_id=request.log_data.get("id", "unknown"),
             status=result["status"],
             event_type=result["event_type"],
@@ -56,16 +69,11 @@ async def analyze_log(
             timestamp=result["timestamp"]
         )
         
-        # Log analysis in background
-        background_tasks.add_task(
-            _log_analysis_result,
-            current_user.id,
-            request.log_data,
-            result
-        )
+        # Queue analysis for the audit log
+        _log_analysis_result(current_user.id, request.log_data, result)
         
         logger.info(f"Log analyzed for user {current_user.username}: {result['event_type']}")
-        return response
+        return ORJSONResponse(content=response.model_dump())
         
     except HTTPException:
         raise
@@ -77,43 +85,66 @@ async def analyze_log(
         )
 
 
-@router.post("/analyze-batch", response_model=List[LogAnalysisResponse])
+@router.post("/analyze-batch", response_model=List[LogAnalysisResponse], response_class=ORJSONResponse)
 async def analyze_batch_logs(
     logs: List[Dict[str, Any]],
-    background_tasks: BackgroundTasks,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["core:analyze"]))
 ) -> Any:
-    """Analyze multiple log entries in batch"""
+    """Analyze multiple log entries in batch, streaming NDJSON if the client accepts it"""
+    user_id = current_user.id
+    username = current_user.username
+    
+    def _response(i: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        # Build response from trusted engine output, skipping validation
+        return LogAnalysisResponse.model_construct(
+            log_id=logs[i].get("id", f"batch_{i}"),
+            status=result["status"],
+            event_type=result["event_type"],
+            priority=result["priority"],
+            processing_time=result.get("processing_time", 0.0),
+            ai_response=result.get("ai_response", {}),
+            timestamp=result["timestamp"]
+        ).model_dump()
+    
+    if wants_ndjson(request):
+        async def _stream():
+            succeeded = 0
+            try:
+                async for i, result in reasoning_engine.stream_process_logs(logs):
+                    if result["status"] != "success":
+                        continue
+                    succeeded += 1
+                    yield _response(i, result)
+                
+            except Exception as e:
+                logger.error(f"Failed to analyze batch logs: {e}")
+                # The 200 status is already sent, so a terminal error line marks the stream as truncated
+                yield {
+                    "error": "Failed to analyze batch logs",
+                    "succeeded": succeeded,
+                    "total": len(logs)
+                }
+            finally:
+                # Queue batch analysis for the audit log
+                _log_batch_analysis_result(user_id, len(logs), succeeded)
+                logger.info(f"Batch analysis completed for user {username}: {len(logs)} logs")
+        
+        return ndjson_response(_stream())
+    
     try:
-        # Process logs through reasoning engine
         results = await reasoning_engine.batch_process_logs(logs)
+        responses = [
+            _response(i, result) for i, result in enumerate(results)
+            if result["status"] == "success"
+        ]
         
-        # Build responses
-        responses = []
-        for i, result in enumerate(results):
-            if result["status"] == "success":
-                response = LogAnalysisResponse(
-                    log_id=logs[i].get("id", f"batch_{i}"),
-                    status=result["status"],
-                    event_type=result["event_type"],
-                    priority=result["priority"],
-                    processing_time=result.get("processing_time", 0.0),
-                    ai_response=result.get("ai_response", {}),
-                    timestamp=result["timestamp"]
-                )
-                responses.append(response)
-        
-        # Log batch analysis in background
-        background_tasks.add_task(
-            _log_batch_analysis_result,
-            current_user.id,
-            logs,
-            results
-        )
+        # Queue batch analysis for the audit log
+        _log_batch_analysis_result(user_id, len(logs), len(responses))
         
-        logger.info(f"Batch analysis completed for user {current_user.username}: {len(logs)} logs")
-        return responses
+        logger.info(f"Batch analysis completed for user {username}: {len(logs)} logs")
+        return ORJSONResponse(content=responses)
         
     except Exception as e:
         logger.error(f"Failed to analyze batch logs: {e}")
@@ -123,32 +154,53 @@ async def analyze_batch_logs(
         )
 
 
-@router.post("/knowledge/query", response_model=KnowledgeQueryResponse)
+@router.post("/knowledge/query", response_model=KnowledgeQueryResponse, response_class=ORJSONResponse)
 async def query_knowledge(
     request: KnowledgeQueryRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["knowledge:read"]))
 ) -> Any:
     """Query knowledge base for relevant information"""
+    tenant_id = get_tenant_id(http_request)
+    if not await is_tenant_member(db, current_user, tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this tenant"
+        )
+    
     try:
+        # Serve repeated queries from the cache
+        cache_key = await _knowledge_cache_key(tenant_id, request)
+        if cache_key:
+            cached = await _get_cached_knowledge(cache_key)
+            if cached is not None:
+                return Response(content=cached, media_type="application/json")
+        
         # Query knowledge manager
         results = await knowledge_manager.query_knowledge(
             query=request.query,
+            tenant_id=tenant_id,
             knowledge_type=request.knowledge_type,
             top_k=request.top_k,
-            similarity_threshold=request.similarity_threshold
+            similarity_threshold=request.similarity_threshold,
+            ef_search=request.ef_search
         )
         
-        response = KnowledgeQueryResponse(
+        # Knowledge manager results are trusted, skip validation
+        response = KnowledgeQueryResponse.model_construct(
             query=request.query,
             results=results,
             total_results=len(results),
             knowledge_type=request.knowledge_type,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utc_timestamp()
         )
         
+        if cache_key:
+            await _cache_knowledge(cache_key, response)
+        
         logger.info(f"Knowledge query completed for user {current_user.username}: {len(results)} results")
-        return response
+        return ORJSONResponse(content=response.model_dump())
         
     except Exception as e:
         logger.error(f"Failed to query knowledge base: {e}")
@@ -162,29 +214,55 @@ async def query_knowledge(
 async def add_knowledge(
     content: str,
     metadata: Dict[str, Any],
+    http_request: Request,
     knowledge_type: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["knowledge:write"]))
 ) -> Any:
-    """Add new knowledge to the vector store"""
+    """Add new knowledge to the caller's tenant"""
+    tenant_id = get_tenant_id(http_request)
+    if not await is_tenant_member(db, current_user, tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this tenant"
+        )
+    
     try:
         # Add metadata about the user
         metadata["added_by"] = current_user.username
-        metadata["added_at"] = datetime.utcnow().isoformat()
+        metadata["added_at"] = utc_timestamp()
+        
+        # Skip content the tenant has already ingested under the same type
+        content_hash, is_new = await claim_knowledge_hash(tenant_id, content, knowledge_type)
+        if not is_new:
+            logger.info(f"Duplicate knowledge from user {current_user.username} skipped: {content_hash}")
+            return {
+                "status": "duplicate",
+                "hash": content_hash,
+                "timestamp": utc_timestamp()
+            }
         
         # Add to knowledge manager
-        result = await knowledge_manager.add_knowledge(
-            content=content,
-            metadata=metadata,
-            knowledge_type=knowledge_type
-        )
+        try:
+            result = await knowledge_manager.add_knowledge(
+                content=content,
+                metadata=metadata,
+                tenant_id=tenant_id,
+                knowledge_type=knowledge_type
+            )
+        except Exception:
+            await release_knowledge_hash(tenant_id, content_hash)
+            raise
         
         if result["status"] == "error":
+            await release_knowledge_hash(tenant_id, content_hash)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to add knowledge: {result['error']}"
             )
         
+        await _bump_knowledge_version()
+        
         logger.info(f"Knowledge added by user {current_user.username}: {result['chunks']} chunks")
         return result
         
@@ -201,7 +279,6 @@ async def add_knowledge(
 @router.post("/incident/generate-plan", response_model=IncidentResponse)
 async def generate_noc_action_plan(
     request: IncidentRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["incident:manage"]))
 ) -> Any:
@@ -216,7 +293,8 @@ async def generate_noc_action_plan(
                 detail=f"Failed to generate action plan: {result['error']}"
             )
         
-        response = IncidentResponse(
+        # Build response from trusted engine output, skipping validation
+        response = IncidentResponse.model_construct(
             incident_id=request.incident_data.get("id", "unknown"),
             status=result["status"],
             noc_action_plan=result.get("noc_action_plan", ""),
@@ -224,13 +302,8 @@ async def generate_noc_action_plan(
             timestamp=result["timestamp"]
         )
         
-        # Log incident plan generation
-        background_tasks.add_task(
-            _log_incident_plan,
-            current_user.id,
-            request.incident_data,
-            result
-        )
+        # Queue incident plan generation for the audit log
+        _log_incident_plan(current_user.id, request.incident_data, result)
         
         logger.info(f"NOC action plan generated for user {current_user.username}: incident {request.incident_data.get('id')}")
         return response
@@ -264,7 +337,7 @@ async def search_similar_incidents(
             "query": incident_description,
             "results": results,
             "total_results": len(results),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_timestamp()
         }
         
     except Exception as e:
@@ -283,14 +356,17 @@ async def get_system_status(
     """Get comprehensive system status"""
     try:
         # Get stats from all components
-        reasoning_stats = await reasoning_engine.get_stats()
-        knowledge_stats = await knowledge_manager.get_knowledge_stats()
+        reasoning_stats, knowledge_stats = await asyncio.gather(
+            reasoning_engine.get_stats(),
+            knowledge_manager.get_knowledge_stats()
+        )
         
-        response = SystemStatusResponse(
+        # Stats come from our own components, skip validation
+        response = SystemStatusResponse.model_construct(
             status="healthy",
             reasoning_engine=reasoning_stats,
             knowledge_manager=knowledge_stats,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utc_timestamp()
         )
         
         return response
@@ -305,25 +381,31 @@ async def get_system_status(
 
 @router.post("/knowledge/index")
 async def index_knowledge_base(
-    background_tasks: BackgroundTasks,
     force_reindex: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["knowledge:admin"]))
 ) -> Any:
     """Index the entire knowledge base"""
+    global _index_task
+    
+    # Coalesce concurrent requests onto the run already in progress
+    if _index_task is not None and not _index_task.done():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Knowledge base indexing is already in progress"
+        )
+    
     try:
         # Run indexing in background
-        background_tasks.add_task(
-            _index_knowledge_base_task,
-            current_user.id,
-            force_reindex
+        _index_task = asyncio.create_task(
+            _index_knowledge_base_task(current_user.id, force_reindex)
         )
         
         return {
             "status": "started",
             "message": "Knowledge base indexing started in background",
             "force_reindex": force_reindex,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_timestamp()
         }
         
     except Exception as e:
@@ -339,29 +421,31 @@ async def health_check() -> Any:
     """Health check endpoint"""
     try:
         # Check all components
-        reasoning_stats = await reasoning_engine.get_stats()
-        knowledge_stats = await knowledge_manager.get_knowledge_stats()
+        reasoning_stats, knowledge_stats = await asyncio.gather(
+            reasoning_engine.get_stats(),
+            knowledge_manager.get_knowledge_stats()
+        )
         
         # Determine overall health
         if not reasoning_stats.get("is_running", False):
             return {
                 "status": "unhealthy",
                 "reason": "Reasoning engine is not running",
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_timestamp()
             }
         
         if knowledge_stats.get("total_documents", 0) == 0:
             return {
                 "status": "warning",
                 "reason": "Knowledge base is empty",
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_timestamp()
             }
         
         return {
             "status": "healthy",
             "reasoning_engine": reasoning_stats,
             "knowledge_manager": knowledge_stats,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_timestamp()
         }
         
     except Exception as e:
@@ -369,44 +453,109 @@ async def health_check() -> Any:
         return {
             "status": "error",
             "reason": str(e),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_timestamp()
         }
 
 
-# Background tasks
-async def _log_analysis_result(user_id: int, log_data: Dict[str, Any], result: Dict[str, Any]):
-    """Log analysis result to database"""
+# Knowledge query cache, invalidated by bumping the knowledge version
+async def _knowledge_cache_key(tenant_id: str, request: KnowledgeQueryRequest) -> Optional[str]:
+    """Build the cache key for a tenant's knowledge query, or None when the cache is unavailable"""
     try:
-        # This would log to audit table
-        logger.info(f"Log analysis result for user {user_id}: {result['event_type']}")
+        client = await rate_limiter._get_redis_client()
+        version = await client.get(KNOWLEDGE_VERSION_KEY) or "0"
+    except Exception as e:
+        logger.warning(f"Knowledge cache unavailable: {e}")
+        return None
+    
+    query = " ".join(request.query.split()).lower()
+    raw = f"{tenant_id}|{query}|{request.knowledge_type}|{request.top_k}|{request.similarity_threshold}|{request.ef_search}"
+    return f"kq:{version}:{blake2b(raw.encode(), digest_size=16).hexdigest()}"
+
+
+async def _get_cached_knowledge(key: str) -> Optional[str]:
+    """Get a cached knowledge query response as serialized JSON"""
+    try:
+        client = await rate_limiter._get_redis_client()
+        cached = await client.get(key)
+        if cached:
+            return cached
+    except Exception as e:
+        logger.warning(f"Failed to read knowledge cache: {e}")
+    return None
+
+
+async def _cache_knowledge(key: str, response: KnowledgeQueryResponse):
+    """Cache a knowledge query response"""
+    try:
+        client = await rate_limiter._get_redis_client()
+        await client.set(key, response.model_dump_json(), ex=settings.KNOWLEDGE_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Failed to write knowledge cache: {e}")
+
+
+async def _bump_knowledge_version():
+    """Invalidate cached knowledge queries"""
+    try:
+        client = await rate_limiter._get_redis_client()
+        await client.incr(KNOWLEDGE_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to bump knowledge version: {e}")
+
+
+# Audit logging, batched by the audit queue
+def _log_analysis_result(user_id: int, log_data: Dict[str, Any], result: Dict[str, Any]):
+    """Queue analysis result for the audit table"""
+    try:
+        audit_queue.record(
+            user_id,
+            "core:analyze_log",
+            resource="log",
+            resource_id=str(log_data.get("id", "unknown")),
+            details={
+                "event_type": result.get("event_type"),
+                "priority": result.get("priority"),
+                "processing_time": result.get("processing_time")
+            }
+        )
     except Exception as e:
         logger.error(f"Failed to log analysis result: {e}")
 
 
-async def _log_batch_analysis_result(user_id: int, logs: List[Dict[str, Any]], results: List[Dict[str, Any]]):
-    """Log batch analysis result to database"""
+def _log_batch_analysis_result(user_id: int, total: int, succeeded: int):
+    """Queue batch analysis result for the audit table"""
     try:
-        # This would log to audit table
-        logger.info(f"Batch analysis result for user {user_id}: {len(logs)} logs processed")
+        audit_queue.record(
+            user_id,
+            "core:analyze_batch",
+            resource="log_batch",
+            details={"total": total, "succeeded": succeeded}
+        )
     except Exception as e:
         logger.error(f"Failed to log batch analysis result: {e}")
 
 
-async def _log_incident_plan(user_id: int, incident_data: Dict[str, Any], result: Dict[str, Any]):
-    """Log incident plan generation to database"""
+def _log_incident_plan(user_id: int, incident_data: Dict[str, Any], result: Dict[str, Any]):
+    """Queue incident plan generation for the audit table"""
     try:
-        # This would log to audit table
-        logger.info(f"Incident plan generated for user {user_id}: incident {incident_data.get('id')}")
+        audit_queue.record(
+            user_id,
+            "incident:generate_plan",
+            resource="incident",
+            resource_id=str(incident_data.get("id", "unknown")),
+            details={"knowledge_used": len(result.get("knowledge_used", []))}
+        )
     except Exception as e:
         logger.error(f"Failed to log incident plan: {e}")
 
 
+# Background tasks
 async def _index_knowledge_base_task(user_id: int, force_reindex: bool):
     """Background task to index knowledge base"""
     try:
         logger.info(f"Starting knowledge base indexing for user {user_id}")
         
         result = await knowledge_manager.index_knowledge_base(force_reindex=force_reindex)
+        await _bump_knowledge_version()
         
         logger.info(f"Knowledge base indexing completed: {result}")
         
@@ -4,19 +4,100 @@ Comprehensive health monitoring for API and system components
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Mapping, Callable, Awaitable
+from types import MappingProxyType
 import asyncio
 import time
 import psutil
-from datetime import datetime
+from sqlalchemy import text
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, engine
 from app.core.logic.reasoning_engine import reasoning_engine
 from app.core.logic.knowledge_manager import knowledge_manager
 from app.core.rate_limiter import rate_limiter
+from app.core.logging import get_logger
+from app.core.timestamps import utc_timestamp
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Per-process invariants reported by the health checks
+_BOOT_TIME = psutil.boot_time()
+_DB_HOST = settings.DATABASE_URL.split('@')[-1].split('/')[0] if '@' in settings.DATABASE_URL else "unknown"
+_HEALTH_STMT = text("SELECT 1")
+
+
+class _SystemSampler:
+    """Samples host resource usage in the background for health checks"""
+    
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self.snapshot: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def sample(self):
+        """Take a non-blocking snapshot of CPU, memory and disk usage"""
+        self.snapshot = {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "cpu_count": psutil.cpu_count(),
+            "memory": psutil.virtual_memory(),
+            "disk": psutil.disk_usage('/'),
+            "load_average": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None,
+            "sampled_at": time.time()
+        }
+    
+    async def sample_async(self) -> Dict[str, Any]:
+        """Take a fresh snapshot with the blocking psutil calls off the event loop"""
+        cpu_percent, memory, disk = await asyncio.gather(
+            asyncio.to_thread(psutil.cpu_percent, None),
+            asyncio.to_thread(psutil.virtual_memory),
+            asyncio.to_thread(psutil.disk_usage, '/')
+        )
+        self.snapshot = {
+            "cpu_percent": cpu_percent,
+            "cpu_count": psutil.cpu_count(),
+            "memory": memory,
+            "disk": disk,
+            "load_average": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None,
+            "sampled_at": time.time()
+        }
+        return self.snapshot
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Latest snapshot, sampling on demand if the sampler is not running"""
+        if not self.snapshot:
+            self.sample()
+        return self.snapshot
+    
+    async def run(self):
+        """Refresh the snapshot every interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sample_async()
+            except Exception as e:
+                logger.error(f"System sampling failed: {e}")
+    
+    def start(self):
+        """Prime CPU accounting and start the sampling task"""
+        psutil.cpu_percent(interval=None)
+        self.sample()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        """Cancel the sampling task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+system_sampler = _SystemSampler()
 
 
 @router.get("/")
@@ -26,13 +107,13 @@ async def health_check() -> Dict[str, Any]:
         "status": "healthy",
         "service": "NOCbRAIN",
         "version": settings.VERSION,
-        "timestamp": datetime.now().isoformat(),
-        "uptime": time.time() - psutil.boot_time()
+        "timestamp": utc_timestamp(),
+        "uptime": time.time() - _BOOT_TIME
     }
 
 
 @router.get("/detailed")
-async def detailed_health_check() -> Dict[str, Any]:
+async def detailed_health_check(fresh: bool = False) -> Dict[str, Any]:
     """Detailed health check with component status"""
     start_time = time.time()
     
@@ -43,26 +124,32 @@ async def detailed_health_check() -> Dict[str, Any]:
         "qdrant": check_qdrant_health(),
         "reasoning_engine": check_reasoning_engine_health(),
         "knowledge_manager": check_knowledge_manager_health(),
-        "system": check_system_health()
+        "system": check_system_health(fresh)
     }
     
-    # Wait for all health checks
+    # Run all health checks concurrently, each with its own timeout
+    names = list(tasks)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(tasks[name], timeout=5.0) for name in names),
+        return_exceptions=True
+    )
+    
     results = {}
-    for component, task in tasks.items():
-        try:
-            results[component] = await asyncio.wait_for(task, timeout=5.0)
-        except asyncio.TimeoutError:
+    for component, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
             results[component] = {
                 "status": "unhealthy",
                 "error": "Health check timeout",
                 "response_time": 5.0
             }
-        except Exception as e:
+        elif isinstance(outcome, Exception):
             results[component] = {
                 "status": "unhealthy",
-                "error": str(e),
+                "error": str(outcome),
                 "response_time": time.time() - start_time
             }
+        else:
+            results[component] = outcome
     
     # Determine overall status
     overall_status = "healthy"
@@ -75,12 +162,13 @@ async def detailed_health_check() -> Dict[str, Any]:
             overall_status = "unhealthy"
     
     total_response_time = time.time() - start_time
+    snapshot = system_sampler.get_snapshot()
     
     return {
         "status": overall_status,
         "service": "NOCbRAIN",
         "version": settings.VERSION,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": utc_timestamp(),
         "response_time": total_response_time,
         "components": results,
         "summary": {
@@ -90,11 +178,11 @@ async def detailed_health_check() -> Dict[str, Any]:
             "unhealthy_list": unhealthy_components
         },
         "system_info": {
-            "uptime": time.time() - psutil.boot_time(),
-            "cpu_percent": psutil.cpu_percent(interval=1),
-            "memory_percent": psutil.virtual_memory().percent,
+            "uptime": time.time() - _BOOT_TIME,
+            "cpu_percent": snapshot["cpu_percent"],
+            "memory_percent": snapshot["memory"].percent,
             "disk_usage": {
-                "percent": psutil.disk_usage('/').percent if hasattr(psutil.disk_usage('/'), 'percent') else 0
+                "percent": snapshot["disk"].percent
             }
         }
     }
@@ -105,21 +193,17 @@ async def check_database_health() -> Dict[str, Any]:
     start_time = time.time()
     
     try:
-        # Try to get a database session
-        from app.core.database import get_db_session
-        
-        async with get_db_session() as db:
-            # Simple health query
-            result = await db.execute("SELECT 1 as health_check")
-            await result.fetchone()
+        # Simple health query on a pooled connection, no ORM session needed
+        async with engine.connect() as conn:
+            await conn.scalar(_HEALTH_STMT)
         
         response_time = time.time() - start_time
         
         return {
             "status": "healthy",
             "response_time": response_time,
-            "database": settings.DATABASE_URL.split('@')[-1].split('/')[0] if '@' in settings.DATABASE_URL else "unknown",
-            "checked_at": datetime.now().isoformat()
+            "database": _DB_HOST,
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -127,36 +211,23 @@ async def check_database_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "database": settings.DATABASE_URL.split('@')[-1].split('/')[0] if '@' in settings.DATABASE_URL else "unknown",
-            "checked_at": datetime.now().isoformat()
+            "database": _DB_HOST,
+            "checked_at": utc_timestamp()
         }
 
 
 async def check_redis_health() -> Dict[str, Any]:
-    """Check Redis health"""
+    """Check Redis health with a single PING on the shared client"""
     start_time = time.time()
     
     try:
-        # Test Redis connection
         redis_client = await rate_limiter._get_redis_client()
-        
-        # Ping Redis
         pong = await redis_client.ping()
-        response_time = time.time() - start_time
-        
-        # Get Redis info
-        info = await redis_client.info()
         
         return {
             "status": "healthy" if pong else "unhealthy",
-            "response_time": response_time,
-            "redis_info": {
-                "version": info.get("redis_version"),
-                "used_memory": info.get("used_memory_human"),
-                "connected_clients": info.get("connected_clients"),
-                "uptime_in_seconds": info.get("uptime_in_seconds")
-            },
-            "checked_at": datetime.now().isoformat()
+            "response_time": time.time() - start_time,
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -164,8 +235,30 @@ async def check_redis_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
+        }
+
+
+async def check_redis_details() -> Dict[str, Any]:
+    """Check Redis health including server info"""
+    result = await check_redis_health()
+    if result["status"] != "healthy":
+        return result
+    
+    try:
+        redis_client = await rate_limiter._get_redis_client()
+        info = await redis_client.info()
+        
+        result["redis_info"] = {
+            "version": info.get("redis_version"),
+            "used_memory": info.get("used_memory_human"),
+            "connected_clients": info.get("connected_clients"),
+            "uptime_in_seconds": info.get("uptime_in_seconds")
         }
+    except Exception as e:
+        logger.error(f"Failed to get Redis info: {e}")
+    
+    return result
 
 
 async def check_qdrant_health() -> Dict[str, Any]:
@@ -185,7 +278,7 @@ async def check_qdrant_health() -> Dict[str, Any]:
                 "collection_name": global_stats.get("collection_name", "unknown"),
                 "vector_size": global_stats.get("vector_size", "unknown")
             },
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -193,7 +286,7 @@ async def check_qdrant_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
 
 
@@ -215,7 +308,7 @@ async def check_reasoning_engine_health() -> Dict[str, Any]:
                 "queue_size": stats.get("queue_size", 0),
                 "last_processed": stats.get("last_processed")
             },
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -223,7 +316,7 @@ async def check_reasoning_engine_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
 
 
@@ -244,7 +337,7 @@ async def check_knowledge_manager_health() -> Dict[str, Any]:
                 "collection_status": "active",
                 "last_indexed": global_stats.get("last_indexed")
             },
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -252,19 +345,20 @@ async def check_knowledge_manager_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
 
 
-async def check_system_health() -> Dict[str, Any]:
+async def check_system_health(fresh: bool = False) -> Dict[str, Any]:
     """Check system resources health"""
     start_time = time.time()
     
     try:
-        # Get system metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        # Get system metrics from the background sampler unless a fresh sample is requested
+        snapshot = await system_sampler.sample_async() if fresh else system_sampler.get_snapshot()
+        cpu_percent = snapshot["cpu_percent"]
+        memory = snapshot["memory"]
+        disk = snapshot["disk"]
         
         # Determine health based on thresholds
         cpu_status = "healthy" if cpu_percent < 80 else "warning" if cpu_percent < 95 else "critical"
@@ -286,7 +380,7 @@ async def check_system_health() -> Dict[str, Any]:
                 "cpu": {
                     "percent": cpu_percent,
                     "status": cpu_status,
-                    "count": psutil.cpu_count()
+                    "count": snapshot["cpu_count"]
                 },
                 "memory": {
                     "total": memory.total,
@@ -301,10 +395,10 @@ async def check_system_health() -> Dict[str, Any]:
                     "percent": disk.percent,
                     "status": disk_status
                 },
-                "uptime": time.time() - psutil.boot_time(),
-                "load_average": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
+                "uptime": time.time() - _BOOT_TIME,
+                "load_average": snapshot["load_average"]
             },
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
         
     except Exception as e:
@@ -312,35 +406,38 @@ async def check_system_health() -> Dict[str, Any]:
             "status": "unhealthy",
             "error": str(e),
             "response_time": time.time() - start_time,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
 
 
+# Every check takes the `fresh` flag; only the system check has a cached sample to bypass
+_COMPONENT_CHECKS: Mapping[str, Callable[[bool], Awaitable[Dict[str, Any]]]] = MappingProxyType({
+    "database": lambda fresh: check_database_health(),
+    "redis": lambda fresh: check_redis_details(),
+    "qdrant": lambda fresh: check_qdrant_health(),
+    "reasoning_engine": lambda fresh: check_reasoning_engine_health(),
+    "knowledge_manager": lambda fresh: check_knowledge_manager_health(),
+    "system": check_system_health
+})
+_COMPONENT_NAMES = list(_COMPONENT_CHECKS)
+
+
 @router.get("/components/{component}")
-async def component_health_check(component: str) -> Dict[str, Any]:
+async def component_health_check(component: str, fresh: bool = False) -> Dict[str, Any]:
     """Health check for specific component"""
-    component_checks = {
-        "database": check_database_health,
-        "redis": check_redis_health,
-        "qdrant": check_qdrant_health,
-        "reasoning_engine": check_reasoning_engine_health,
-        "knowledge_manager": check_knowledge_manager_health,
-        "system": check_system_health
-    }
-    
-    if component not in component_checks:
+    check = _COMPONENT_CHECKS.get(component)
+    if check is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Component '{component}' not found. Available: {list(component_checks.keys())}"
+            detail=f"Component '{component}' not found. Available: {_COMPONENT_NAMES}"
         )
     
     try:
-        result = await component_checks[component]()
-        return result
+        return await check(fresh)
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e),
             "component": component,
-            "checked_at": datetime.now().isoformat()
+            "checked_at": utc_timestamp()
         }
@@ -3,11 +3,30 @@ NOCbRAIN Knowledge Base Endpoints
 Basic knowledge base functionality
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
+
+from app.core.database import get_db
+from app.core.logic.knowledge_manager import knowledge_manager
+from app.core.logging import get_logger
+from app.core.security import check_permissions
+from app.middleware.tenant import get_tenant_id, is_tenant_member
+from app.models.user import User
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Categories are fixed, so they are serialized once at import
+_CATEGORIES_JSON = orjson.dumps(["networking", "security", "infrastructure", "troubleshooting"])
+
+# Seconds serialized document listings are reused, keyed by category
+DOCUMENTS_CACHE_TTL = 30.0
+_documents_cache: Dict[Optional[str], tuple] = {}
 
 
 class KnowledgeQuery(BaseModel):
@@ -34,37 +53,47 @@ class DocumentCreate(BaseModel):
 
 
 @router.post("/query", response_model=KnowledgeResponse)
-async def query_knowledge(query_data: KnowledgeQuery) -> KnowledgeResponse:
-    """Query the knowledge base"""
-    # Mock implementation
-    mock_results = [
-        {
-            "id": 1,
-            "title": "Network Troubleshooting Guide",
-            "content": "Basic steps for network troubleshooting...",
-            "relevance_score": 0.95,
-            "category": "networking"
-        },
-        {
-            "id": 2,
-            "title": "Security Best Practices",
-            "content": "Essential security practices for NOC...",
-            "relevance_score": 0.87,
-            "category": "security"
-        }
-    ]
+async def query_knowledge(
+    query_data: KnowledgeQuery,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_permissions(["knowledge:read"]))
+) -> KnowledgeResponse:
+    """Query the knowledge base of a tenant the caller belongs to"""
+    tenant_id = get_tenant_id(request)
+    if not await is_tenant_member(db, current_user, tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this tenant"
+        )
+    
+    filters = query_data.filters or {}
+    started = time.perf_counter()
+    
+    # HNSW search over the tenant's and global knowledge collections;
+    # the knowledge manager logs failures and returns no results
+    results = await knowledge_manager.query_knowledge(
+        query=query_data.query,
+        tenant_id=tenant_id,
+        knowledge_type=filters.get("knowledge_type"),
+        top_k=query_data.limit,
+        similarity_threshold=filters.get("similarity_threshold", 0.7),
+        include_global=filters.get("include_global", True)
+    )
     
-    return KnowledgeResponse(
+    return KnowledgeResponse.model_construct(
         query=query_data.query,
-        results=mock_results,
-        total_count=len(mock_results),
-        execution_time=0.123
+        results=results,
+        total_count=len(results),
+        execution_time=time.perf_counter() - started
     )
 
 
 @router.post("/documents", response_model=Dict[str, str])
 async def create_document(doc_data: DocumentCreate) -> Dict[str, str]:
     """Create a new knowledge document"""
+    _documents_cache.clear()
+    
     # Mock implementation
     return {
         "message": "Document created successfully",
@@ -74,7 +103,18 @@ async def create_document(doc_data: DocumentCreate) -> Dict[str, str]:
 
 @router.get("/documents", response_model=List[Dict[str, Any]])
 async def get_documents(category: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Get knowledge documents"""
+    """Get knowledge documents, reusing the serialized listing for a short TTL"""
+    cached = _documents_cache.get(category)
+    if cached and time.monotonic() - cached[0] < DOCUMENTS_CACHE_TTL:
+        return Response(content=cached[1], media_type="application/json")
+    
+    content = orjson.dumps(_load_documents(category))
+    _documents_cache[category] = (time.monotonic(), content)
+    return Response(content=content, media_type="application/json")
+
+
+def _load_documents(category: Optional[str]) -> List[Dict[str, Any]]:
+    """Load knowledge documents"""
     # Mock implementation
     return [
         {
@@ -97,4 +137,4 @@ async def get_documents(category: Optional[str] = None) -> List[Dict[str, Any]]:
 @router.get("/categories")
 async def get_categories() -> List[str]:
     """Get available knowledge categories"""
-    return ["networking", "security", "infrastructure", "troubleshooting"]
+    return Response(content=_CATEGORIES_JSON, media_type="application/json")
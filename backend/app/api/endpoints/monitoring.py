@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any, Dict, Optional
-from datetime import datetime, timedelta
-import json
+from typing import List, Any, Dict, Optional, Tuple
+from datetime import timedelta
 import asyncio
+import re
+import time
+import orjson
 
 from app.core.database import get_db
 from app.core.security import get_current_active_user, check_permissions
@@ -13,50 +16,146 @@ from app.schemas.monitoring import (
     AgentResponse, AgentConfig, AlertRule, AlertResponse
 )
 from app.modules.monitoring.service import MonitoringService
+from app.modules.monitoring.payload import agent_api_key, agent_body_encoding, decode_agent_body
+from app.core.batching import BatchQueue
+from app.core.streaming import ndjson_response, wants_ndjson
+from app.core.timestamps import utc_timestamp
+from app.core.config import settings
 from app.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 monitoring_service = MonitoringService()
 
+# Agent payloads are queued and processed in batches by a single flusher
+metrics_queue = BatchQueue(
+    monitoring_service.process_metrics_batch,
+    settings.METRICS_BATCH_SIZE,
+    settings.METRICS_BATCH_MS,
+    name="metrics"
+)
+
+# Common metric query windows resolve with one lookup; other "<n><unit>" ranges are parsed
+_TIME_RANGES: Dict[str, timedelta] = {
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "30m": timedelta(minutes=30),
+    "1h": timedelta(hours=1),
+    "6h": timedelta(hours=6),
+    "12h": timedelta(hours=12),
+    "24h": timedelta(hours=24),
+    "1d": timedelta(days=1),
+    "7d": timedelta(days=7),
+    "1w": timedelta(weeks=1),
+    "30d": timedelta(days=30)
+}
+_TIME_RANGE_RE = re.compile(r'^(\d+)([smhdw])$')
+_TIME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+# Window used for unrecognized time ranges
+DEFAULT_TIME_WINDOW = timedelta(hours=1)
+
+# Seconds a user's serialized dashboard summary is reused, keyed by user id
+DASHBOARD_CACHE_TTL = 30.0
+_dashboard_cache: Dict[int, tuple] = {}
+# Bumped on invalidation so builds started before it neither fill the cache nor gain followers
+_dashboard_generation = 0
+# (generation, future) of summaries being built, awaited by concurrent requests for the same user
+_dashboard_inflight: Dict[int, Tuple[int, asyncio.Future]] = {}
+
+def _invalidate_dashboard_cache():
+    """Drop cached dashboard summaries and orphan builds already in flight"""
+    global _dashboard_generation
+    _dashboard_generation += 1
+    _dashboard_cache.clear()
+
+def parse_time_range(time_range: str) -> timedelta:
+    """Resolve a "<n><unit>" time range to a timedelta, falling back to one hour"""
+    delta = _TIME_RANGES.get(time_range)
+    if delta is None:
+        match = _TIME_RANGE_RE.match(time_range)
+        if not match:
+            return DEFAULT_TIME_WINDOW
+        delta = timedelta(**{_TIME_UNITS[match.group(2)]: int(match.group(1))})
+    return delta
+
+async def read_agent_payload(request: Request) -> Dict[str, Any]:
+    """Decode an agent payload sent as raw (encrypted and/or zstd-compressed) bytes or as JSON"""
+    body = await request.body()
+    encrypted, compressed = agent_body_encoding(request.headers)
+    if encrypted or compressed:
+        body = await asyncio.to_thread(
+            decode_agent_body, body, agent_api_key(request.headers), encrypted, compressed
+        )
+    
+    payload = orjson.loads(body)
+    # Legacy agents wrap the encrypted payload in a JSON envelope
+    if 'data' in payload:
+        return orjson.loads(monitoring_service.decrypt_metrics(payload['data']))
+    return payload
+
 @router.post("/metrics", response_model=Dict[str, Any])
 async def receive_metrics(
-    metrics_data: Dict[str, Any],
-    background_tasks: BackgroundTasks,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["monitoring:write"]))
 ) -> Any:
     """Receive metrics from monitoring agents"""
     try:
         # Decrypt metrics data if encrypted
-        if 'data' in metrics_data:
-            decrypted_data = monitoring_service.decrypt_metrics(metrics_data['data'])
-            metrics = json.loads(decrypted_data)
-        else:
-            metrics = metrics_data
+        metrics = await read_agent_payload(request)
         
-        # Process metrics in background
-        background_tasks.add_task(
-            monitoring_service.process_metrics,
-            metrics,
-            current_user.id
-        )
+        # Queue metrics for batched processing
+        await metrics_queue.put((metrics, current_user.id))
         
-        logger.info(f"Metrics received from agent {metrics.get('agent_id')}")
+        logger.info("Metrics received from agent %s", metrics.get('agent_id'))
         
         return {
             "status": "received",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "agent_id": metrics.get('agent_id')
         }
         
     except Exception as e:
-        logger.error(f"Failed to process metrics: {e}")
+        logger.error("Failed to process metrics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to process metrics"
         )
 
+@router.post("/bundle", response_model=Dict[str, Any])
+async def receive_bundle(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_permissions(["monitoring:write"]))
+) -> Any:
+    """Receive system metrics, application metrics and heartbeat in one request"""
+    try:
+        # Decrypt bundle if encrypted
+        bundle = await read_agent_payload(request)
+        
+        # Queue each metrics section for batched processing
+        for section in ('system', 'apps'):
+            if bundle.get(section):
+                await metrics_queue.put((bundle[section], current_user.id))
+        
+        if bundle.get('heartbeat'):
+            await monitoring_service.update_agent_heartbeat(bundle['heartbeat'])
+        
+        logger.info("Metrics bundle received from agent %s", bundle.get('agent_id'))
+        
+        return {
+            "status": "received",
+            "timestamp": utc_timestamp(),
+            "agent_id": bundle.get('agent_id')
+        }
+    
+    except Exception as e:
+        logger.error("Failed to process metrics bundle: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to process metrics bundle"
+        )
+
 @router.post("/heartbeat")
 async def receive_heartbeat(
     heartbeat_data: Dict[str, Any],
@@ -65,10 +164,10 @@ async def receive_heartbeat(
     """Receive heartbeat from monitoring agents"""
     try:
         result = await monitoring_service.update_agent_heartbeat(heartbeat_data)
-        logger.debug(f"Heartbeat received from agent {heartbeat_data.get('agent_id')}")
+        logger.debug("Heartbeat received from agent %s", heartbeat_data.get('agent_id'))
         return result
     except Exception as e:
-        logger.error(f"Failed to process heartbeat: {e}")
+        logger.error("Failed to process heartbeat: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to process heartbeat"
@@ -83,10 +182,10 @@ async def register_agent(
     """Register a new monitoring agent"""
     try:
         agent = await monitoring_service.register_agent(agent_data, current_user.id)
-        logger.info(f"Agent {agent.id} registered by user {current_user.username}")
+        logger.info("Agent %s registered by user %s", agent.id, current_user.username)
         return agent
     except Exception as e:
-        logger.error(f"Failed to register agent: {e}")
+        logger.error("Failed to register agent: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -94,20 +193,27 @@ async def register_agent(
 
 @router.get("/agents", response_model=List[AgentResponse])
 async def get_agents(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["monitoring:read"]))
 ) -> Any:
-    """Get list of registered monitoring agents"""
+    """Get list of registered monitoring agents, as NDJSON if the client accepts it"""
+    if wants_ndjson(request):
+        return ndjson_response(monitoring_service.iter_agents(
+            db, skip, limit, status_filter, current_user.id
+        ))
+    
     try:
         agents = await monitoring_service.get_agents(
             db, skip, limit, status_filter, current_user.id
         )
-        return agents
+        # Already validated by the service, so skip response_model revalidation
+        return ORJSONResponse(content=[agent.model_dump() for agent in agents])
     except Exception as e:
-        logger.error(f"Failed to get agents: {e}")
+        logger.error("Failed to get agents: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve agents"
@@ -131,7 +237,7 @@ async def get_agent(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get agent {agent_id}: {e}")
+        logger.error("Failed to get agent %s: %s", agent_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve agent"
@@ -154,12 +260,12 @@ async def update_agent_config(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found"
             )
-        logger.info(f"Agent {agent_id} config updated by user {current_user.username}")
+        logger.info("Agent %s config updated by user %s", agent_id, current_user.username)
         return agent
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update agent config {agent_id}: {e}")
+        logger.error("Failed to update agent config %s: %s", agent_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -179,12 +285,12 @@ async def delete_agent(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found"
             )
-        logger.info(f"Agent {agent_id} deleted by user {current_user.username}")
+        logger.info("Agent %s deleted by user %s", agent_id, current_user.username)
         return {"message": "Agent deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to delete agent {agent_id}: {e}")
+        logger.error("Failed to delete agent %s: %s", agent_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -202,11 +308,11 @@ async def query_metrics(
     """Query stored metrics"""
     try:
         metrics = await monitoring_service.query_metrics(
-            db, agent_id, metric_type, time_range, aggregation, current_user.id
+            db, agent_id, metric_type, time_range, parse_time_range(time_range), aggregation, current_user.id
         )
         return metrics
     except Exception as e:
-        logger.error(f"Failed to query metrics: {e}")
+        logger.error("Failed to query metrics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to query metrics"
@@ -221,10 +327,11 @@ async def create_alert_rule(
     """Create new alert rule"""
     try:
         alert_rule = await monitoring_service.create_alert_rule(rule, current_user.id)
-        logger.info(f"Alert rule {alert_rule.id} created by user {current_user.username}")
+        _invalidate_dashboard_cache()
+        logger.info("Alert rule %s created by user %s", alert_rule.id, current_user.username)
         return alert_rule
     except Exception as e:
-        logger.error(f"Failed to create alert rule: {e}")
+        logger.error("Failed to create alert rule: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -240,9 +347,9 @@ async def get_alert_rules(
     """Get alert rules"""
     try:
         rules = await monitoring_service.get_alert_rules(db, skip, limit, current_user.id)
-        return rules
+        return ORJSONResponse(content=[rule.model_dump() for rule in rules])
     except Exception as e:
-        logger.error(f"Failed to get alert rules: {e}")
+        logger.error("Failed to get alert rules: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve alert rules"
@@ -250,19 +357,25 @@ async def get_alert_rules(
 
 @router.get("/alerts", response_model=List[Dict[str, Any]])
 async def get_active_alerts(
+    request: Request,
     severity: Optional[str] = None,
     acknowledged: Optional[bool] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["monitoring:read"]))
 ) -> Any:
-    """Get active alerts"""
+    """Get active alerts, as NDJSON if the client accepts it"""
+    if wants_ndjson(request):
+        return ndjson_response(monitoring_service.iter_active_alerts(
+            db, severity, acknowledged, current_user.id
+        ))
+    
     try:
         alerts = await monitoring_service.get_active_alerts(
             db, severity, acknowledged, current_user.id
         )
-        return alerts
+        return ORJSONResponse(content=alerts)
     except Exception as e:
-        logger.error(f"Failed to get alerts: {e}")
+        logger.error("Failed to get alerts: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve alerts"
@@ -284,12 +397,13 @@ async def acknowledge_alert(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Alert not found"
             )
-        logger.info(f"Alert {alert_id} acknowledged by user {current_user.username}")
+        _invalidate_dashboard_cache()
+        logger.info("Alert %s acknowledged by user %s", alert_id, current_user.username)
         return {"message": "Alert acknowledged successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to acknowledge alert {alert_id}: {e}")
+        logger.error("Failed to acknowledge alert %s: %s", alert_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -309,44 +423,77 @@ async def websocket_monitoring(
             from app.core.security import verify_token
             payload = verify_token(token)
             username = payload.get("sub")
-            logger.info(f"WebSocket monitoring connection established for user: {username}")
+            logger.info("WebSocket monitoring connection established for user: %s", username)
         else:
             await websocket.close(code=4001, reason="Authentication required")
             return
         
-        # Subscribe to real-time metrics
-        await monitoring_service.subscribe_to_metrics(websocket, username)
-        
-        # Keep connection alive
-        while True:
-            try:
-                # Send real-time data
-                data = await monitoring_service.get_realtime_metrics(username)
-                await websocket.send_json(data)
-                await asyncio.sleep(5)  # Send updates every 5 seconds
-            except Exception as e:
-                logger.error(f"Error sending WebSocket metrics: {e}")
-                await websocket.send_json({"error": str(e)})
-                break
+        # Subscribe to real-time metrics pushed by the service
+        queue = await monitoring_service.subscribe_to_metrics(username)
+        try:
+            while True:
+                await websocket.send_text(await queue.get())
+        finally:
+            await monitoring_service.unsubscribe_from_metrics(queue, username)
                 
     except WebSocketDisconnect:
         logger.info("WebSocket monitoring client disconnected")
-        await monitoring_service.unsubscribe_from_metrics(username)
     except Exception as e:
-        logger.error(f"WebSocket monitoring error: {e}")
+        logger.error("WebSocket monitoring error: %s", e)
         await websocket.close(code=4000, reason="Internal server error")
 
+async def _build_dashboard_summary(db: AsyncSession, user_id: int) -> bytes:
+    """Build and cache a user's serialized summary, sharing one build across concurrent callers"""
+    while True:
+        generation = _dashboard_generation
+        inflight = _dashboard_inflight.get(user_id)
+        if inflight is None or inflight[0] != generation:
+            break
+        
+        future = inflight[1]
+        try:
+            # Shielded so a disconnecting follower does not cancel the shared build
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Only the leader's cancellation is retried; our own is propagated
+            if not future.cancelled() or asyncio.current_task().cancelling():
+                raise
+    
+    future = asyncio.get_running_loop().create_future()
+    _dashboard_inflight[user_id] = (generation, future)
+    try:
+        summary = await monitoring_service.get_dashboard_summary(db, user_id)
+        content = orjson.dumps(summary.model_dump())
+        if generation == _dashboard_generation:
+            _dashboard_cache[user_id] = (time.monotonic(), content)
+        future.set_result(content)
+        return content
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved when there are no followers
+        raise
+    finally:
+        if _dashboard_inflight.get(user_id, (None, None))[1] is future:
+            del _dashboard_inflight[user_id]
+        if not future.done():
+            # Leader cancelled; followers see the cancelled future and retry
+            future.cancel()
+
 @router.get("/dashboard/summary")
 async def get_dashboard_summary(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["monitoring:read"]))
 ) -> Any:
-    """Get dashboard summary data"""
+    """Get dashboard summary data, reusing the serialized summary for a short TTL"""
+    cached = _dashboard_cache.get(current_user.id)
+    if cached and time.monotonic() - cached[0] < DASHBOARD_CACHE_TTL:
+        return Response(content=cached[1], media_type="application/json")
+    
     try:
-        summary = await monitoring_service.get_dashboard_summary(db, current_user.id)
-        return summary
+        content = await _build_dashboard_summary(db, current_user.id)
+        return Response(content=content, media_type="application/json")
     except Exception as e:
-        logger.error(f"Failed to get dashboard summary: {e}")
+        logger.error("Failed to get dashboard summary: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve dashboard summary"
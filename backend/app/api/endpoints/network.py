@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Request, status, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Any, Dict
 from datetime import datetime
@@ -12,6 +13,7 @@ from app.schemas.network import (
     SNMPConfig, NetworkScanRequest
 )
 from app.modules.network.service import NetworkService
+from app.core.streaming import ndjson_response, wants_ndjson
 from app.core.logging import get_logger
 
 router = APIRouter()
@@ -28,10 +30,10 @@ async def create_device(
     """Add a new network device for monitoring"""
     try:
         result = await network_service.add_device(db, device, current_user.id)
-        logger.info(f"Device {device.name} added by user {current_user.username}")
+        logger.info("Device %s added by user %s", device.name, current_user.username)
         return result
     except Exception as e:
-        logger.error(f"Failed to add device {device.name}: {e}")
+        logger.error("Failed to add device %s: %s", device.name, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -40,17 +42,22 @@ async def create_device(
 
 @router.get("/devices", response_model=List[DeviceResponse])
 async def get_devices(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["network:read"]))
 ) -> Any:
-    """Get list of monitored network devices"""
+    """Get list of monitored network devices, as NDJSON if the client accepts it"""
+    if wants_ndjson(request):
+        return ndjson_response(network_service.iter_devices(db, skip, limit, current_user.id))
+    
     try:
         devices = await network_service.get_devices(db, skip, limit, current_user.id)
-        return devices
+        # Already validated by the service, so skip response_model revalidation
+        return ORJSONResponse(content=[device.model_dump() for device in devices])
     except Exception as e:
-        logger.error(f"Failed to get devices: {e}")
+        logger.error("Failed to get devices: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve devices"
@@ -75,7 +82,7 @@ async def get_device(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get device {device_id}: {e}")
+        logger.error("Failed to get device %s: %s", device_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve device"
@@ -97,12 +104,12 @@ async def update_device(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Device not found"
             )
-        logger.info(f"Device {device_id} updated by user {current_user.username}")
+        logger.info("Device %s updated by user %s", device_id, current_user.username)
         return device
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update device {device_id}: {e}")
+        logger.error("Failed to update device %s: %s", device_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -123,12 +130,12 @@ async def delete_device(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Device not found"
             )
-        logger.info(f"Device {device_id} deleted by user {current_user.username}")
+        logger.info("Device %s deleted by user %s", device_id, current_user.username)
         return {"message": "Device deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to delete device {device_id}: {e}")
+        logger.error("Failed to delete device %s: %s", device_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -144,10 +151,10 @@ async def scan_network(
     """Scan network for discoverable devices"""
     try:
         result = await network_service.scan_network(db, scan_request, current_user.id)
-        logger.info(f"Network scan initiated by user {current_user.username}")
+        logger.info("Network scan initiated by user %s", current_user.username)
         return result
     except Exception as e:
-        logger.error(f"Failed to scan network: {e}")
+        logger.error("Failed to scan network: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -164,7 +171,7 @@ async def get_network_topology(
         topology = await network_service.get_network_topology(db, current_user.id)
         return topology
     except Exception as e:
-        logger.error(f"Failed to get network topology: {e}")
+        logger.error("Failed to get network topology: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve network topology"
@@ -183,7 +190,7 @@ async def get_network_metrics(
         metrics = await network_service.get_network_metrics(db, device_id, time_range, current_user.id)
         return metrics
     except Exception as e:
-        logger.error(f"Failed to get network metrics: {e}")
+        logger.error("Failed to get network metrics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve network metrics"
@@ -200,10 +207,10 @@ async def configure_snmp(
     """Configure SNMP settings for a device"""
     try:
         result = await network_service.configure_snmp(db, device_id, snmp_config, current_user.id)
-        logger.info(f"SNMP configured for device {device_id} by user {current_user.username}")
+        logger.info("SNMP configured for device %s by user %s", device_id, current_user.username)
         return result
     except Exception as e:
-        logger.error(f"Failed to configure SNMP for device {device_id}: {e}")
+        logger.error("Failed to configure SNMP for device %s: %s", device_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -225,25 +232,21 @@ async def websocket_network_monitoring(
             from app.core.security import verify_token
             payload = verify_token(token)
             username = payload.get("sub")
-            logger.info(f"WebSocket connection established for user: {username}")
+            logger.info("WebSocket connection established for user: %s", username)
         else:
             await websocket.close(code=4001, reason="Authentication required")
             return
         
-        # Start real-time monitoring
-        while True:
-            try:
-                # Get real-time network data
-                data = await network_service.get_realtime_data()
-                await websocket.send_json(data)
-                await asyncio.sleep(5)  # Send updates every 5 seconds
-            except Exception as e:
-                logger.error(f"Error sending WebSocket data: {e}")
-                await websocket.send_json({"error": str(e)})
-                break
+        # Subscribe to real-time network data pushed by the service
+        queue = await network_service.subscribe_to_realtime(username)
+        try:
+            while True:
+                await websocket.send_text(await queue.get())
+        finally:
+            await network_service.unsubscribe_from_realtime(queue, username)
                 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
         await websocket.close(code=4000, reason="Internal server error")
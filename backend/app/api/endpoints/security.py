@@ -3,7 +3,8 @@ NOCbRAIN Security Analysis API Endpoints
 Integration with security pattern engine for threat detection
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -11,18 +12,24 @@ from datetime import datetime
 from app.core.database import get_db
 from app.core.security import get_current_active_user, check_permissions
 from app.models.user import User
-from app.security_analyzer.pattern_engine import pattern_engine
+from app.security_analyzer.pattern_engine import pattern_engine, ThreatType
 from app.schemas.security import (
-    LogAnalysisRequest, LogAnalysisResponse,
+    LogAnalysisRequest, LogAnalysisResponse, SecurityEventBatch,
     ThreatAlertRequest, ThreatAlertResponse,
     SecurityStatsResponse
 )
+from app.core.audit import audit_queue, audit_record
+from app.core.streaming import ndjson_response, wants_ndjson
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Threat type values the detection self-tests filter on
+BRUTE_FORCE = ThreatType.BRUTE_FORCE.value
+LATERAL_MOVEMENT = ThreatType.LATERAL_MOVEMENT.value
+
 
 @router.post("/analyze-log", response_model=LogAnalysisResponse)
 async def analyze_security_log(
@@ -65,26 +72,57 @@ async def analyze_security_log(
 @router.post("/analyze-batch", response_model=List[LogAnalysisResponse])
 async def analyze_batch_logs(
     logs: List[Dict[str, Any]],
+    request: Request,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_permissions(["security:analyze"]))
 ) -> Any:
-    """Analyze multiple security logs in batch"""
+    """Analyze multiple security logs in batch, streaming NDJSON if the client accepts it"""
+    username = current_user.username
+    all_threats: List[List[Dict[str, Any]]] = []
+    
+    def _response(i: int, threats: List[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
+        return {
+            "log_id": logs[i].get("id", f"batch_{i}"),
+            "threats_detected": len(threats),
+            "threats": threats,
+            "timestamp": timestamp
+        }
+    
+    async def _stream():
+        # Stamp the whole batch once
+        timestamp = datetime.utcnow().isoformat()
+        try:
+            async for i, threats in pattern_engine.analyze_batch_iter(logs):
+                all_threats.append(threats)
+                yield _response(i, threats, timestamp)
+        except Exception as e:
+            logger.error(f"Failed to analyze batch security logs: {e}")
+            # The 200 status is already sent, so a terminal error line marks the stream as truncated
+            yield {
+                "error": "Failed to analyze batch security logs",
+                "analyzed": len(all_threats),
+                "total": len(logs)
+            }
+        finally:
+            logger.info(f"Batch security analysis completed for user {username}: {len(all_threats)}/{len(logs)} logs")
+    
+    if wants_ndjson(request):
+        # Runs after the stream finishes, with the threats collected while streaming
+        background_tasks.add_task(
+            _log_batch_security_analysis,
+            current_user.id,
+            logs,
+            all_threats
+        )
+        return ndjson_response(_stream())
+    
     try:
-        # Analyze logs through pattern engine
         all_threats = await pattern_engine.analyze_batch(logs)
         
-        # Build responses
-        responses = []
-        for i, log in enumerate(logs):
-            threats = all_threats[i] if i < len(all_threats) else []
-            response = LogAnalysisResponse(
-                log_id=log.get("id", f"batch_{i}"),
-                threats_detected=len(threats),
-                threats=threats,
-                timestamp=datetime.utcnow().isoformat()
-            )
-            responses.append(response)
+        # Build responses as plain dicts, stamping the whole batch once
+        timestamp = datetime.utcnow().isoformat()
+        responses = [_response(i, threats, timestamp) for i, threats in enumerate(all_threats)]
         
         # Log batch analysis in background
         background_tasks.add_task(
@@ -94,8 +132,9 @@ async def analyze_batch_logs(
             all_threats
         )
         
-        logger.info(f"Batch security analysis completed for user {current_user.username}: {len(logs)} logs")
-        return responses
+        logger.info(f"Batch security analysis completed for user {username}: {len(logs)} logs")
+        # Skip response_model validation of every threat dict
+        return ORJSONResponse(content=responses)
         
     except Exception as e:
         logger.error(f"Failed to analyze batch security logs: {e}")
@@ -105,6 +144,34 @@ async def analyze_batch_logs(
         )
 
 
+@router.post("/events/batch")
+async def receive_security_events(
+    batch: SecurityEventBatch,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(check_permissions(["security:analyze"]))
+) -> Any:
+    """Receive a batch of events detected by a security agent"""
+    records = [
+        audit_record(
+            current_user.id,
+            "security:agent_event",
+            resource="security_event",
+            resource_id=batch.agent_id,
+            details={"event": item.event, "analysis": item.analysis}
+        )
+        for item in batch.events
+    ]
+    # One multi-row insert per batch, after the agent has its response
+    background_tasks.add_task(audit_queue.write_many, records)
+    
+    logger.info(f"Received {len(records)} security events from agent {batch.agent_id}")
+    return {
+        "status": "received",
+        "events": len(records),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @router.get("/threats/summary")
 async def get_threat_summary(
     time_window: int = 3600,
@@ -114,7 +181,7 @@ async def get_threat_summary(
     """Get threat summary for time window"""
     try:
         summary = await pattern_engine.get_threat_summary(time_window)
-        return summary
+        return ORJSONResponse(content=summary)
         
     except Exception as e:
         logger.error(f"Failed to get threat summary: {e}")
@@ -179,23 +246,13 @@ async def get_security_patterns(
 ) -> Any:
     """Get all security patterns"""
     try:
-        patterns = []
-        for pattern in pattern_engine.patterns:
-            patterns.append({
-                "name": pattern.name,
-                "threat_type": pattern.threat_type.value,
-                "severity": pattern.severity.value,
-                "description": pattern.description,
-                "patterns": pattern.patterns,
-                "conditions": pattern.conditions,
-                "tags": pattern.tags
-            })
+        patterns = pattern_engine.get_patterns()
         
-        return {
+        return ORJSONResponse(content={
             "patterns": patterns,
             "total_patterns": len(patterns),
             "timestamp": datetime.utcnow().isoformat()
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get security patterns: {e}")
@@ -266,11 +323,13 @@ async def test_brute_force_detection(
 ) -> Any:
     """Test brute force detection with sample logs"""
     try:
+        timestamp = datetime.utcnow().isoformat()
+        
         # Sample brute force logs
         test_logs = [
             {
                 "id": "test_bf_1",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.100",
                 "message": "Failed password for root from 192.168.1.100 port 22 ssh2",
                 "severity": "warning",
@@ -278,7 +337,7 @@ async def test_brute_force_detection(
             },
             {
                 "id": "test_bf_2",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.100",
                 "message": "Failed password for root from 192.168.1.100 port 22 ssh2",
                 "severity": "warning",
@@ -286,7 +345,7 @@ async def test_brute_force_detection(
             },
             {
                 "id": "test_bf_3",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.100",
                 "message": "Failed password for root from 192.168.1.100 port 22 ssh2",
                 "severity": "warning",
@@ -294,7 +353,7 @@ async def test_brute_force_detection(
             },
             {
                 "id": "test_bf_4",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.100",
                 "message": "Failed password for root from 192.168.1.100 port 22 ssh2",
                 "severity": "warning",
@@ -302,7 +361,7 @@ async def test_brute_force_detection(
             },
             {
                 "id": "test_bf_5",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.100",
                 "message": "Failed password for root from 192.168.1.100 port 22 ssh2",
                 "severity": "warning",
@@ -315,9 +374,9 @@ async def test_brute_force_detection(
         
         # Count brute force threats
         brute_force_threats = [
-            threat for threat_list in threats 
-            for threat in threat_list 
-            if threat.get("threat_type") == "brute_force"
+            threat for threat_list in threats
+            for threat in threat_list
+            if threat["threat_type"] == BRUTE_FORCE
         ]
         
         return {
@@ -325,7 +384,7 @@ async def test_brute_force_detection(
             "test_logs": len(test_logs),
             "threats_detected": len(brute_force_threats),
             "threats": brute_force_threats,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
         
     except Exception as e:
@@ -343,11 +402,13 @@ async def test_port_scan_detection(
 ) -> Any:
     """Test port scan detection with sample logs"""
     try:
+        timestamp = datetime.utcnow().isoformat()
+        
         # Sample port scan logs
         test_logs = [
             {
                 "id": "test_ps_1",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.200",
                 "message": "Port scan detected from 192.168.1.200",
                 "severity": "warning",
@@ -355,7 +416,7 @@ async def test_port_scan_detection(
             },
             {
                 "id": "test_ps_2",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.200",
                 "message": "Connection attempt to port 22 from 192.168.1.200",
                 "severity": "info",
@@ -363,7 +424,7 @@ async def test_port_scan_detection(
             },
             {
                 "id": "test_ps_3",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.200",
                 "message": "Connection attempt to port 80 from 192.168.1.200",
                 "severity": "info",
@@ -371,7 +432,7 @@ async def test_port_scan_detection(
             },
             {
                 "id": "test_ps_4",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.200",
                 "message": "Connection attempt to port 443 from 192.168.1.200",
                 "severity": "info",
@@ -379,7 +440,7 @@ async def test_port_scan_detection(
             },
             {
                 "id": "test_ps_5",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp,
                 "source_ip": "192.168.1.200",
                 "message": "Connection attempt to port 3389 from 192.168.1.200",
                 "severity": "info",
@@ -392,9 +453,9 @@ async def test_port_scan_detection(
         
         # Count port scan threats
         port_scan_threats = [
-            threat for threat_list in threats 
-            for threat in threat_list 
-            if threat.get("threat_type") == "lateral_movement"
+            threat for threat_list in threats
+            for threat in threat_list
+            if threat["threat_type"] == LATERAL_MOVEMENT
         ]
         
         return {
@@ -402,7 +463,7 @@ async def test_port_scan_detection(
             "test_logs": len(test_logs),
             "threats_detected": len(port_scan_threats),
             "threats": port_scan_threats,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
         
     except Exception as e:
@@ -413,19 +474,50 @@ async def test_port_scan_detection(
         )
 
 
-# Background tasks
+# Audit logging, one audit row per analyzed log
+def _threat_details(threats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize detected threats for an audit record"""
+    return {
+        "threats_detected": len(threats),
+        "threats": [
+            {
+                "alert_id": threat.get("alert_id"),
+                "threat_type": threat.get("threat_type"),
+                "severity": threat.get("severity"),
+                "pattern_name": threat.get("pattern_name")
+            }
+            for threat in threats
+        ]
+    }
+
+
 async def _log_security_analysis(user_id: int, log_data: Dict[str, Any], threats: List[Dict[str, Any]]):
-    """Log security analysis result to database"""
+    """Queue security analysis result for the audit table"""
     try:
-        logger.info(f"Security analysis result for user {user_id}: {len(threats)} threats")
+        audit_queue.record(
+            user_id,
+            "security:analyze_log",
+            resource="log",
+            resource_id=str(log_data.get("id", "unknown")),
+            details=_threat_details(threats)
+        )
     except Exception as e:
         logger.error(f"Failed to log security analysis result: {e}")
 
 
 async def _log_batch_security_analysis(user_id: int, logs: List[Dict[str, Any]], all_threats: List[List[Dict[str, Any]]]):
-    """Log batch security analysis result to database"""
+    """Write batch security analysis results to the audit table in one insert"""
     try:
-        total_threats = sum(len(threats) for threats in all_threats)
-        logger.info(f"Batch security analysis result for user {user_id}: {len(logs)} logs, {total_threats} threats")
+        records = [
+            audit_record(
+                user_id,
+                "security:analyze_batch",
+                resource="log",
+                resource_id=str(log.get("id", f"batch_{i}")),
+                details=_threat_details(threats)
+            )
+            for i, (log, threats) in enumerate(zip(logs, all_threats))
+        ]
+        await audit_queue.write_many(records)
     except Exception as e:
         logger.error(f"Failed to log batch security analysis result: {e}")
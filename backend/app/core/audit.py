@@ -0,0 +1,103 @@
+"""
+NOCbRAIN Audit Log Queue
+Batched, non-blocking writes to the audit_logs table
+"""
+
+import json
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import insert
+
+from app.core.batching import BatchQueue
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.models.user import AuditLog
+
+logger = get_logger(__name__)
+
+AUDIT_QUEUE_DEPTH = Gauge('nocbrain_audit_queue_depth', 'Audit records waiting to be written')
+AUDIT_RECORDS_DROPPED = Counter('nocbrain_audit_records_dropped_total', 'Audit records dropped because the queue was full')
+
+# Bounded string columns; one oversized value would fail the whole multi-row insert
+_STRING_LIMITS = {
+    name: AuditLog.__table__.c[name].type.length
+    for name in ("action", "resource", "resource_id")
+}
+
+
+def _fit(name: str, value: Optional[Any]) -> Optional[str]:
+    """Coerce a value to a string that fits its audit_logs column"""
+    if value is None:
+        return None
+    return str(value)[:_STRING_LIMITS[name]]
+
+
+def audit_record(
+    user_id: Optional[int],
+    action: str,
+    resource: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build an audit_logs row, truncating strings to their column lengths"""
+    return {
+        "user_id": user_id,
+        "action": _fit("action", action),
+        "resource": _fit("resource", resource),
+        "resource_id": _fit("resource_id", resource_id),
+        "details": json.dumps(details, default=str) if details is not None else None,
+        "timestamp": datetime.utcnow()
+    }
+
+
+class AuditLogQueue(BatchQueue):
+    """In-memory audit queue drained into multi-row inserts"""
+    
+    def __init__(self, batch_size: int = None, batch_ms: int = None, maxsize: int = 10000):
+        super().__init__(
+            self._write,
+            batch_size or settings.AUDIT_BATCH_SIZE,
+            batch_ms or settings.AUDIT_BATCH_MS,
+            maxsize,
+            name="audit"
+        )
+    
+    def record(
+        self,
+        user_id: Optional[int],
+        action: str,
+        resource: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        """Queue an audit record without waiting for the database"""
+        queued = self.put_nowait(audit_record(user_id, action, resource, resource_id, details))
+        if queued:
+            AUDIT_QUEUE_DEPTH.inc()
+        else:
+            AUDIT_RECORDS_DROPPED.inc()
+            logger.warning(f"Audit queue full, dropping {action} record")
+    
+    async def write_many(self, items: List[Dict[str, Any]]):
+        """Insert audit records in one statement, bypassing the queue"""
+        if not items:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(AuditLog), items)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(items)} audit records: {e}")
+    
+    async def _write(self, items: List[Dict[str, Any]]):
+        """Insert a batch of queued audit records"""
+        try:
+            await self.write_many(items)
+        finally:
+            AUDIT_QUEUE_DEPTH.dec(len(items))
+
+
+audit_queue = AuditLogQueue()
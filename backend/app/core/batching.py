@@ -0,0 +1,103 @@
+"""
+NOCbRAIN Batch Queue
+Bounded in-memory queue drained in batches by a single background consumer
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BatchQueue:
+    """Collects items and hands them to a handler in batches"""
+    
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[None]],
+        batch_size: int,
+        batch_ms: int,
+        maxsize: int = 10000,
+        name: str = "batch"
+    ):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_delay = batch_ms / 1000.0
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._task: Optional[asyncio.Task] = None
+    
+    def put_nowait(self, item: Any) -> bool:
+        """Queue an item without waiting, returning False if the queue is full"""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def put(self, item: Any):
+        """Queue an item, waiting for room if the queue is full"""
+        await self._queue.put(item)
+    
+    async def _next_batch(self) -> List[Any]:
+        """Wait for one item, then collect more until full or the delay expires"""
+        items = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_delay
+        
+        while len(items) < self.batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return items
+    
+    async def _flush(self, items: List[Any]):
+        """Hand a batch to the handler"""
+        try:
+            await self.handler(items)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(items)} {self.name} items: {e}")
+        finally:
+            for _ in items:
+                self._queue.task_done()
+    
+    async def run(self):
+        """Drain the queue until cancelled"""
+        while True:
+            items = await self._next_batch()
+            await self._flush(items)
+    
+    def start(self):
+        """Start the background consumer"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self, timeout: float = 5.0):
+        """Flush queued items and stop the consumer"""
+        if self._task is None:
+            return
+        
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} unflushed {self.name} items")
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,53 @@
+"""
+NOCbRAIN Knowledge Content Hashes
+Per-tenant Redis sets of ingested content hashes, used to skip duplicate uploads
+"""
+
+from hashlib import blake2b
+from typing import Optional
+
+from app.core.logging import get_logger
+from app.core.rate_limiter import rate_limiter
+
+logger = get_logger(__name__)
+
+KNOWLEDGE_HASHES_PREFIX = "kb:hashes:"
+
+
+def _hashes_key(tenant_id: str) -> str:
+    """Redis set holding one tenant's content hashes"""
+    return f"{KNOWLEDGE_HASHES_PREFIX}{tenant_id}"
+
+
+def knowledge_hash(content: str, knowledge_type: Optional[str] = None) -> str:
+    """Hash content together with its knowledge type"""
+    return blake2b(f"{knowledge_type or ''}\x00{content}".encode(), digest_size=16).hexdigest()
+
+
+async def claim_knowledge_hash(tenant_id: str, content: str, knowledge_type: Optional[str] = None) -> tuple[str, bool]:
+    """Record the content hash for a tenant, returning whether it was new"""
+    content_hash = knowledge_hash(content, knowledge_type)
+    try:
+        client = await rate_limiter._get_redis_client()
+        return content_hash, bool(await client.sadd(_hashes_key(tenant_id), content_hash))
+    except Exception as e:
+        logger.warning(f"Knowledge dedupe unavailable: {e}")
+        return content_hash, True
+
+
+async def release_knowledge_hash(tenant_id: str, content_hash: str):
+    """Forget a content hash after a failed ingestion"""
+    try:
+        client = await rate_limiter._get_redis_client()
+        await client.srem(_hashes_key(tenant_id), content_hash)
+    except Exception as e:
+        logger.warning(f"Failed to release knowledge hash: {e}")
+
+
+async def clear_knowledge_hashes(tenant_id: str):
+    """Forget a tenant's content hashes once its collection is dropped"""
+    try:
+        client = await rate_limiter._get_redis_client()
+        await client.delete(_hashes_key(tenant_id))
+    except Exception as e:
+        logger.warning(f"Failed to clear knowledge hashes for tenant {tenant_id}: {e}")
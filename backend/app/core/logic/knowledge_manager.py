@@ -10,6 +10,8 @@ from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 from datetime import datetime
 import logging
+import threading
+import time
 import uuid
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -20,14 +22,31 @@ from langchain.chains import RetrievalQA
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue,
+    HnswConfigDiff, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    ProductQuantization, ProductQuantizationConfig, CompressionRatio,
+    SearchParams, QuantizationSearchParams
+)
 import yaml
 
 from app.core.config import settings
+from app.core.knowledge_hashes import clear_knowledge_hashes
 from app.core.logging import get_logger
+from app.core.logic.vector_index import LocalVectorIndex
 
 logger = get_logger(__name__)
 
+# HNSW graph parameters for knowledge collections
+HNSW_M = 16
+HNSW_EF_CONSTRUCT = 64
+
+# Candidates fetched from quantized vectors per result, rescored on the originals
+QUANTIZATION_OVERSAMPLING = 2.0
+
+# Seconds tenant stats are reused across status and health probes
+STATS_CACHE_TTL = 2.0
+
 
 class NetworkKnowledgeSchema:
     """Schema for network knowledge classification"""
@@ -155,6 +174,15 @@ class TenantAwareKnowledgeManager:
         # Knowledge base path
         self.knowledge_base_path = Path(settings.KNOWLEDGE_BASE_PATH)
         
+        # In-process ANN indexes, mirrored from Qdrant when enabled
+        self.use_local_index = settings.ANN_BACKEND == "usearch"
+        self.local_indexes: Dict[str, LocalVectorIndex] = {}
+        # Local indexes load in worker threads; one load per collection at a time
+        self._local_index_lock = threading.Lock()
+        
+        # Short-lived tenant stats, keyed by tenant_id
+        self._stats_cache: Dict[str, tuple] = {}
+        
         logger.info("Multi-tenant Knowledge Manager initialized")
     
     def _get_collection_name(self, tenant_id: str) -> str:
@@ -196,7 +224,12 @@ class TenantAwareKnowledgeManager:
                     vectors_config=VectorParams(
                         size=1536,  # OpenAI embedding dimension
                         distance=Distance.COSINE
-                    )
+                    ),
+                    hnsw_config=HnswConfigDiff(
+                        m=HNSW_M,
+                        ef_construct=HNSW_EF_CONSTRUCT
+                    ),
+                    quantization_config=self._quantization_config()
                 )
                 logger.info(f"Created collection: {collection_name}")
             else:
@@ -221,6 +254,9 @@ class TenantAwareKnowledgeManager:
             if force_reindex:
                 logger.info(f"Force reindexing tenant {tenant_id} - clearing existing collection")
                 self.qdrant_client.delete_collection(collection_name)
+                self.local_indexes.pop(collection_name, None)
+                self._stats_cache.pop(tenant_id, None)
+                await clear_knowledge_hashes(tenant_id)
                 await self.initialize_collection(tenant_id)
                 existing_count = 0
             
@@ -297,12 +333,9 @@ class TenantAwareKnowledgeManager:
                 chunk.metadata["tenant_id"] = tenant_id
                 chunk.metadata["is_global"] = tenant_id == "global"
             
-            # Get tenant-specific vector store
-            vector_store = self._get_tenant_vector_store(tenant_id)
-            
             # Add chunks to vector store
             if chunks:
-                vector_store.add_documents(chunks)
+                self._add_chunks(tenant_id, chunks)
             
             return {
                 "status": "success",
@@ -315,6 +348,35 @@ class TenantAwareKnowledgeManager:
             logger.error(f"Failed to index file {file_path} for tenant {tenant_id}: {e}")
             raise
     
+    def _quantization_config(self) -> Union[ScalarQuantization, ProductQuantization]:
+        """Build the vector quantization config for new collections"""
+        if settings.VECTOR_QUANTIZATION == "pq":
+            return ProductQuantization(
+                product=ProductQuantizationConfig(
+                    compression=CompressionRatio(settings.VECTOR_PQ_COMPRESSION),
+                    always_ram=True
+                )
+            )
+        
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    
+    def _search_params(self, top_k: int, ef_search: Optional[int] = None) -> SearchParams:
+        """Build HNSW search parameters for a query"""
+        return SearchParams(
+            hnsw_ef=ef_search or top_k * 4,
+            quantization=QuantizationSearchParams(
+                ignore=False,
+                rescore=True,
+                oversampling=QUANTIZATION_OVERSAMPLING
+            )
+        )
+    
     def _get_tenant_vector_store(self, tenant_id: str) -> Qdrant:
         """Get tenant-specific vector store"""
         collection_name = self._get_collection_name(tenant_id)
@@ -325,6 +387,72 @@ class TenantAwareKnowledgeManager:
             embeddings=self.embeddings
         )
     
+    def _get_local_index(self, tenant_id: str) -> LocalVectorIndex:
+        """Get tenant's in-process index, loading it from Qdrant on first use (blocking)"""
+        collection_name = self._get_collection_name(tenant_id)
+        
+        index = self.local_indexes.get(collection_name)
+        if index is not None:
+            return index
+        
+        with self._local_index_lock:
+            index = self.local_indexes.get(collection_name)
+            if index is not None:
+                return index
+            
+            index = LocalVectorIndex(dtype=settings.LOCAL_INDEX_DTYPE)
+            offset = None
+            while True:
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=collection_name,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                index.add(
+                    [point.vector for point in points],
+                    [
+                        Document(
+                            page_content=point.payload.get("page_content", ""),
+                            metadata=point.payload.get("metadata", {})
+                        )
+                        for point in points
+                    ]
+                )
+                if offset is None:
+                    break
+            
+            # Cache only a complete index; a failed scroll raises and the next call retries
+            self.local_indexes[collection_name] = index
+        
+        return index
+    
+    def _add_chunks(self, tenant_id: str, chunks: List[Document]):
+        """Add chunks to tenant's vector store and in-process index"""
+        self._stats_cache.pop(tenant_id, None)
+        if not self.use_local_index:
+            self._get_tenant_vector_store(tenant_id).add_documents(chunks)
+            return
+        
+        # Load the local index before writing so the new points are not loaded twice
+        index = self._get_local_index(tenant_id)
+        
+        # Embed once and write the same vectors to both stores
+        vectors = self.embeddings.embed_documents([chunk.page_content for chunk in chunks])
+        self.qdrant_client.upsert(
+            collection_name=self._get_collection_name(tenant_id),
+            points=[
+                PointStruct(
+                    id=uuid.uuid4().hex,
+                    vector=vector,
+                    payload={"page_content": chunk.page_content, "metadata": chunk.metadata}
+                )
+                for chunk, vector in zip(chunks, vectors)
+            ]
+        )
+        index.add(vectors, chunks)
+    
     async def query_knowledge(
         self, 
         query: str, 
@@ -332,10 +460,15 @@ class TenantAwareKnowledgeManager:
         knowledge_type: Optional[str] = None,
         top_k: int = 5,
         similarity_threshold: float = 0.7,
-        include_global: bool = True
+        include_global: bool = True,
+        ef_search: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Query knowledge base with strict tenant isolation"""
         try:
+            search_params = self._search_params(top_k, ef_search)
+            # Embedding and vector searches are blocking calls, so they run off the event loop
+            query_vector = await asyncio.to_thread(self.embeddings.embed_query, query) if self.use_local_index else None
+            
             # Build filter for tenant isolation
             tenant_filter = self._create_tenant_filter(tenant_id)
             
@@ -368,11 +501,23 @@ class TenantAwareKnowledgeManager:
             # Search tenant's private collection
             private_results = []
             try:
-                private_results = private_vector_store.similarity_search_with_score(
-                    query=query,
-                    k=top_k,
-                    filter=tenant_filter
-                )
+                if self.use_local_index:
+                    # The first search loads the index from Qdrant, so it runs in the thread too
+                    private_results = await asyncio.to_thread(
+                        lambda: self._get_local_index(tenant_id).search(
+                            query_vector,
+                            top_k,
+                            predicate=(lambda metadata: metadata.get("knowledge_type") == knowledge_type) if knowledge_type else None
+                        )
+                    )
+                else:
+                    private_results = await asyncio.to_thread(
+                        private_vector_store.similarity_search_with_score,
+                        query=query,
+                        k=top_k,
+                        filter=tenant_filter,
+                        search_params=search_params
+                    )
             except Exception as e:
                 logger.error(f"Error searching private collection for tenant {tenant_id}: {e}")
             
@@ -380,19 +525,30 @@ class TenantAwareKnowledgeManager:
             global_results = []
             if include_global and tenant_id != "global":
                 try:
-                    global_vector_store = self._get_tenant_vector_store("global")
-                    global_results = global_vector_store.similarity_search_with_score(
-                        query=query,
-                        k=max(1, top_k // 2),  # Get half from global
-                        filter=Filter(
-                            must=[
-                                FieldCondition(
-                                    key="metadata.is_global",
-                                    match=MatchValue(value=True)
-                                )
-                            ]
+                    if self.use_local_index:
+                        global_results = await asyncio.to_thread(
+                            lambda: self._get_local_index("global").search(
+                                query_vector,
+                                max(1, top_k // 2),  # Get half from global
+                                predicate=lambda metadata: metadata.get("is_global", False)
+                            )
+                        )
+                    else:
+                        global_vector_store = self._get_tenant_vector_store("global")
+                        global_results = await asyncio.to_thread(
+                            global_vector_store.similarity_search_with_score,
+                            query=query,
+                            k=max(1, top_k // 2),  # Get half from global
+                            filter=Filter(
+                                must=[
+                                    FieldCondition(
+                                        key="metadata.is_global",
+                                        match=MatchValue(value=True)
+                                    )
+                                ]
+                            ),
+                            search_params=search_params
                         )
-                    )
                 except Exception as e:
                     logger.error(f"Error searching global collection: {e}")
             
@@ -554,11 +710,8 @@ NOC ACTION PLAN:"""
                 chunk.metadata["tenant_id"] = tenant_id
                 chunk.metadata["is_global"] = is_global
             
-            # Get tenant-specific vector store
-            vector_store = self._get_tenant_vector_store(tenant_id)
-            
             # Add chunks to vector store
-            vector_store.add_documents(chunks)
+            self._add_chunks(tenant_id, chunks)
             
             return {
                 "status": "success",
@@ -578,8 +731,16 @@ NOC ACTION PLAN:"""
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    async def get_knowledge_stats(self) -> Dict[str, Any]:
+        """Get statistics for the global knowledge base"""
+        return await self.get_tenant_stats("global")
+    
     async def get_tenant_stats(self, tenant_id: str) -> Dict[str, Any]:
-        """Get statistics for specific tenant"""
+        """Get statistics for specific tenant, reusing results for a short TTL"""
+        cached = self._stats_cache.get(tenant_id)
+        if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            return cached[1]
+        
         try:
             collection_name = self._get_collection_name(tenant_id)
             
@@ -591,7 +752,7 @@ NOC ACTION PLAN:"""
             # Get knowledge type distribution
             knowledge_types = list(NetworkKnowledgeSchema.KNOWLEDGE_TYPES.keys())
             
-            return {
+            stats = {
                 "tenant_id": tenant_id,
                 "total_documents": total_count,
                 "knowledge_types": knowledge_types,
@@ -599,6 +760,8 @@ NOC ACTION PLAN:"""
                 "is_global": tenant_id == "global",
                 "last_updated": datetime.utcnow().isoformat()
             }
+            self._stats_cache[tenant_id] = (time.monotonic(), stats)
+            return stats
             
         except Exception as e:
             logger.error(f"Failed to get stats for tenant {tenant_id}: {e}")
@@ -635,6 +798,8 @@ NOC ACTION PLAN:"""
         try:
             logger.info(f"Searching knowledge for tenant {tenant_id}: {query}")
             
+            search_params = self._search_params(limit)
+            
             # Create strict tenant filter - CRITICAL for multi-tenancy security
             tenant_filter = Filter(
                 must=[
@@ -654,6 +819,7 @@ NOC ACTION PLAN:"""
                         collection_name=tenant_collection,
                         query_vector=self.embeddings.embed_query(query),
                         query_filter=tenant_filter,
+                        search_params=search_params,
                         limit=limit,
                         with_payload=True,
                         with_vectors=False
@@ -677,6 +843,7 @@ NOC ACTION PLAN:"""
                     global_search = self.qdrant_client.search(
                         collection_name=global_collection,
                         query_vector=self.embeddings.embed_query(query),
+                        search_params=search_params,
                         limit=limit,
                         with_payload=True,
                         with_vectors=False
@@ -722,6 +889,9 @@ NOC ACTION PLAN:"""
             
             # Delete collection
             self.qdrant_client.delete_collection(collection_name)
+            self.local_indexes.pop(collection_name, None)
+            self._stats_cache.pop(tenant_id, None)
+            await clear_knowledge_hashes(tenant_id)
             
             logger.info(f"Deleted collection for tenant {tenant_id}")
             
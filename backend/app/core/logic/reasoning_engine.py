@@ -5,7 +5,7 @@ Core AI reasoning loop for processing logs and generating NOC Action Plans
 
 import asyncio
 import json
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 from datetime import datetime, timedelta
 from enum import Enum
 import logging
@@ -384,14 +384,28 @@ class ReasoningEngine:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    async def batch_process_logs(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process multiple logs in batch"""
-        results = []
+    async def stream_process_logs(self, logs: List[Dict[str, Any]]) -> AsyncIterator[tuple[int, Dict[str, Any]]]:
+        """Process multiple logs concurrently, yielding (index, result) pairs as they complete"""
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
         
-        for log in logs:
-            result = await self.process_log(log)
-            results.append(result)
+        async def worker(index: int, log: Dict[str, Any]) -> tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                return index, await self.process_log(log)
         
+        tasks = [asyncio.create_task(worker(i, log)) for i, log in enumerate(logs)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Stop outstanding work if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+    
+    async def batch_process_logs(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process multiple logs in batch"""
+        results: List[Dict[str, Any]] = [None] * len(logs)
+        async for index, result in self.stream_process_logs(logs):
+            results[index] = result
         return results
     
     async def search_similar_incidents(
@@ -0,0 +1,85 @@
+"""
+NOCbRAIN Local Vector Index
+In-process HNSW search over knowledge embeddings using USearch
+"""
+
+import threading
+from typing import List, Dict, Tuple, Optional, Callable, Any
+
+from langchain.schema import Document
+
+try:
+    import numpy as np
+    from usearch.index import Index
+except ImportError:
+    np = None
+    Index = None
+
+
+class LocalVectorIndex:
+    """USearch HNSW index holding the documents for one collection"""
+    
+    def __init__(
+        self,
+        ndim: int = 1536,
+        connectivity: int = 16,
+        expansion_add: int = 64,
+        expansion_search: int = 100,
+        dtype: str = "f32"
+    ):
+        if Index is None:
+            raise RuntimeError("usearch is not installed")
+        
+        self.index = Index(
+            ndim=ndim,
+            metric="cos",
+            dtype=dtype,  # f16/i8 store quantized vectors
+            connectivity=connectivity,
+            expansion_add=expansion_add,
+            expansion_search=expansion_search
+        )
+        self.documents: Dict[int, Document] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.documents)
+    
+    def add(self, vectors: List[List[float]], documents: List[Document]):
+        """Add embedded documents to the index"""
+        if not documents:
+            return
+        
+        with self._lock:
+            start = len(self.documents)
+            keys = np.arange(start, start + len(documents), dtype=np.uint64)
+            self.index.add(keys, np.asarray(vectors, dtype=np.float32))
+            for key, document in zip(range(start, start + len(documents)), documents):
+                self.documents[key] = document
+    
+    def search(
+        self,
+        vector: List[float],
+        k: int,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search the index, returning (document, cosine similarity) pairs"""
+        if not self.documents:
+            return []
+        
+        # Oversample when results are filtered after the graph search
+        count = min(len(self.documents), k * 4 if predicate else k)
+        matches = self.index.search(np.asarray(vector, dtype=np.float32), count)
+        
+        results = []
+        for key, distance in zip(matches.keys, matches.distances):
+            # Searches run unlocked, so keys from an add in progress may not have documents yet
+            document = self.documents.get(int(key))
+            if document is None:
+                continue
+            if predicate and not predicate(document.metadata):
+                continue
+            results.append((document, 1.0 - float(distance)))
+            if len(results) >= k:
+                break
+        
+        return results
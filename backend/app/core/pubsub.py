@@ -0,0 +1,98 @@
+"""
+NOCbRAIN Broadcaster
+In-process pub/sub fan-out for WebSocket subscribers
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Set, Tuple
+
+import orjson
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class Broadcaster:
+    """Pushes messages to per-subscriber queues, optionally producing a snapshot every interval
+    
+    While produced snapshots stay unchanged (ignoring volatile_keys) the interval doubles
+    up to max_interval, and resets as soon as a snapshot changes.
+    """
+    
+    def __init__(
+        self,
+        producer: Optional[Callable[[], Awaitable[Any]]] = None,
+        interval: float = 5.0,
+        maxsize: int = 16,
+        name: str = "broadcast",
+        max_interval: float = 30.0,
+        volatile_keys: Tuple[str, ...] = ("timestamp",)
+    ):
+        self.producer = producer
+        self.interval = interval
+        self.max_interval = max_interval
+        self.volatile_keys = volatile_keys
+        self.maxsize = maxsize
+        self.name = name
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        # Last produced snapshot, handed to new subscribers instead of recomputing it
+        self._snapshot: Optional[str] = None
+    
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber queue, starting the producer on first use"""
+        queue: asyncio.Queue = asyncio.Queue(self.maxsize)
+        if self._snapshot is not None:
+            queue.put_nowait(self._snapshot)
+        self._subscribers.add(queue)
+        if self.producer is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue, stopping the producer when none remain"""
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._snapshot = None
+    
+    def publish(self, message: Any) -> Optional[str]:
+        """Serialize a message once and queue it for every subscriber, dropping the oldest when full"""
+        if not self._subscribers:
+            return None
+        
+        data = orjson.dumps(message).decode()
+        for queue in self._subscribers:
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(data)
+        return data
+    
+    def _fingerprint(self, snapshot: Any) -> bytes:
+        """Serialize a snapshot without its volatile keys for change detection"""
+        if isinstance(snapshot, dict) and self.volatile_keys:
+            snapshot = {k: v for k, v in snapshot.items() if k not in self.volatile_keys}
+        return orjson.dumps(snapshot)
+    
+    async def _run(self):
+        """Produce snapshots for all subscribers, only publishing ones that changed"""
+        interval = self.interval
+        fingerprint = None
+        while self._subscribers:
+            try:
+                snapshot = await self.producer()
+                current = self._fingerprint(snapshot)
+                if current != fingerprint:
+                    fingerprint = current
+                    interval = self.interval
+                    self._snapshot = self.publish(snapshot)
+                else:
+                    interval = min(interval * 2, self.max_interval)
+            except Exception as e:
+                logger.error(f"Failed to produce {self.name} snapshot: {e}")
+            await asyncio.sleep(interval)
@@ -38,7 +38,8 @@ class RedisRateLimiter:
                         retry_on_timeout=True,
                         socket_keepalive=True,
                         socket_keepalive_options={},
-                        health_check_interval=30
+                        health_check_interval=30,
+                        max_connections=32
                     )
         return self.redis_client
     
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from functools import lru_cache, reduce
+from operator import or_
+from typing import Any, Union, Optional, Iterable
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,6 +18,36 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT Token
 security = HTTPBearer()
 
+# Permission scopes, one bit each in the access token's "scopes" claim.
+# Append new scopes at the end; reordering changes the meaning of issued tokens.
+PERMISSION_SCOPES = (
+    "core:analyze",
+    "incident:manage",
+    "incident:read",
+    "knowledge:admin",
+    "knowledge:read",
+    "knowledge:write",
+    "monitoring:delete",
+    "monitoring:read",
+    "monitoring:write",
+    "network:delete",
+    "network:read",
+    "network:scan",
+    "network:write",
+    "security:admin",
+    "security:analyze",
+    "security:read",
+    "security:test",
+    "system:read",
+    "tenant:analyze",
+    "tenant:knowledge:read",
+    "tenant:knowledge:write",
+    "tenant:read",
+    "tenant:security:analyze",
+    "tenant:security:read",
+)
+SCOPE_IDS = {name: 1 << bit for bit, name in enumerate(PERMISSION_SCOPES)}
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -27,6 +59,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def scope_mask(permissions: Iterable[str]) -> int:
+    """Encode permission names as a scope bitmap, ignoring unknown names"""
+    return reduce(or_, (SCOPE_IDS.get(name, 0) for name in permissions), 0)
+
+
+def user_scope_mask(user: User) -> int:
+    """Scope bitmap for a user's granted permissions"""
+    return scope_mask(perm.name for perm in user.permissions)
+
+
 def create_access_token(
     data: dict, expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -79,12 +121,14 @@ def verify_token(token: str) -> dict:
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
     payload = verify_token(token)
+    request.state.token_scopes = payload.get("scopes")
     
     username: str = payload.get("sub")
     if username is None:
@@ -119,16 +163,37 @@ async def get_current_active_user(
 
 def check_permissions(required_permissions: list[str]):
     """Decorator to check user permissions"""
-    def permission_checker(current_user: User = Depends(get_current_active_user)):
-        user_permissions = [perm.name for perm in current_user.permissions]
-        for permission in required_permissions:
-            if permission not in user_permissions:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Permission '{permission}' required"
-                )
+    return _permission_checker(tuple(required_permissions))
+
+
+class PermissionChecker:
+    """Permission checker specialized to one route's required scope mask"""
+    
+    def __init__(self, required_permissions: tuple):
+        self.required_permissions = required_permissions
+        # Resolved once per route; unknown permission names fail at import
+        self.required_mask = reduce(or_, (SCOPE_IDS[p] for p in required_permissions), 0)
+    
+    async def __call__(self, request: Request, current_user: User = Depends(get_current_active_user)) -> User:
+        scopes = getattr(request.state, "token_scopes", None)
+        if scopes is None:
+            # Tokens issued before scopes were embedded fall back to the user's permissions
+            scopes = request.state.token_scopes = user_scope_mask(current_user)
+        
+        missing_mask = self.required_mask & ~scopes
+        if missing_mask:
+            missing = next(p for p in self.required_permissions if SCOPE_IDS[p] & missing_mask)
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission '{missing}' required"
+            )
         return current_user
-    return permission_checker
+
+
+@lru_cache(maxsize=None)
+def _permission_checker(required_permissions: tuple) -> PermissionChecker:
+    """Build one shared checker per permission set so FastAPI can reuse it within a request"""
+    return PermissionChecker(required_permissions)
 
 
 class RoleChecker:
@@ -136,9 +201,10 @@ class RoleChecker:
     
     def __init__(self, allowed_roles: list[str]):
         self.allowed_roles = allowed_roles
+        self._allowed = frozenset(allowed_roles)
     
-    def __call__(self, current_user: User = Depends(get_current_active_user)):
-        if current_user.role.name not in self.allowed_roles:
+    async def __call__(self, current_user: User = Depends(get_current_active_user)) -> User:
+        if current_user.role.name not in self._allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required roles: {', '.join(self.allowed_roles)}"
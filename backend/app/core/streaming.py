@@ -0,0 +1,30 @@
+"""
+NOCbRAIN NDJSON Streaming
+Stream list responses one row per line for clients that ask for NDJSON
+"""
+
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Check whether the client accepts an NDJSON stream instead of a JSON array"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def ndjson_lines(rows: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Serialize rows (dicts or Pydantic models) to NDJSON lines as they arrive"""
+    async for row in rows:
+        if hasattr(row, "model_dump"):
+            row = row.model_dump()
+        yield orjson.dumps(row) + b"\n"
+
+
+def ndjson_response(rows: AsyncIterator[Any]) -> StreamingResponse:
+    """Stream rows as an NDJSON response"""
+    return StreamingResponse(ndjson_lines(rows), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,31 @@
+"""
+NOCbRAIN Timestamps
+Cached ISO-8601 UTC timestamps for hot response paths
+"""
+
+import time
+from datetime import datetime, timezone
+
+
+class _TimestampCache:
+    """Formats the current UTC time at most once per second"""
+    
+    def __init__(self):
+        self._second = 0
+        self._value = ""
+    
+    def get(self) -> str:
+        """Current UTC time as an ISO-8601 string with second resolution"""
+        now = int(time.time())
+        if now != self._second:
+            self._value = datetime.fromtimestamp(now, timezone.utc).isoformat().replace("+00:00", "Z")
+            self._second = now
+        return self._value
+
+
+_timestamps = _TimestampCache()
+
+
+def utc_timestamp() -> str:
+    """Cached current UTC timestamp"""
+    return _timestamps.get()
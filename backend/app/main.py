@@ -1,10 +1,13 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
 import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from app.core.config import settings
 from app.core.database import init_db
@@ -13,7 +16,11 @@ from app.core.logging import setup_logging
 from app.core.logic.reasoning_engine import reasoning_engine
 from app.core.logic.knowledge_manager import knowledge_manager
 from app.middleware.tenant import TenantMiddleware
+from app.middleware.compression import CompressionMiddleware
 from app.core.rate_limiter import RateLimitMiddleware
+from app.api.endpoints.health import system_sampler
+from app.api.endpoints.monitoring import metrics_queue
+from app.core.audit import audit_queue
 
 # Setup logging
 setup_logging()
@@ -28,6 +35,10 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting NOCbRAIN backend...")
     
+    # Size the default executor used by asyncio.to_thread for vector search and embeddings
+    workers = settings.THREADPOOL_WORKERS or (os.cpu_count() or 1) * 2
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+    
     # Initialize database
     await init_db()
     logger.info("Database initialized successfully")
@@ -46,11 +57,23 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start reasoning engine: {e}")
     
+    # Start background system metrics sampling for health checks
+    system_sampler.start()
+    
+    # Start batched audit log writer
+    audit_queue.start()
+    
+    # Start batched agent metrics processing
+    metrics_queue.start()
+    
     logger.info("NOCbRAIN backend startup completed")
     yield
     
     # Shutdown
     logger.info("Shutting down NOCbRAIN backend...")
+    await system_sampler.stop()
+    await metrics_queue.stop()
+    await audit_queue.stop()
     try:
         await reasoning_engine.stop()
         logger.info("Reasoning engine stopped")
@@ -64,6 +87,7 @@ app = FastAPI(
     version=settings.VERSION,
     description="AI Network Operations Center Assistant - Comprehensive network monitoring, security analysis, and infrastructure management with multi-tenant RAG-powered intelligence",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc"
 )
@@ -83,6 +107,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (zstd when accepted, gzip otherwise)
+app.add_middleware(CompressionMiddleware, minimum_size=1024, zstd_level=3, gzip_level=5)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
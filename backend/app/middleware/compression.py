@@ -0,0 +1,100 @@
+"""
+NOCbRAIN Compression Middleware
+Response compression with zstd for clients that accept it and gzip otherwise
+"""
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold, preferring zstd over gzip"""
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        zstd_level: int = 3,
+        gzip_level: int = 5
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.zstd = zstandard.ZstdCompressor(level=zstd_level)
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+            if "zstd" in accept_encoding:
+                responder = _ZstdResponder(self.app, self.minimum_size, self.zstd.compressobj())
+                await responder(scope, receive, send)
+                return
+            await self.gzip(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class _ZstdResponder:
+    """Compress a single response with zstd, flushing a block per streamed chunk"""
+    
+    def __init__(self, app: ASGIApp, minimum_size: int, compressor):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = compressor
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_zstd)
+    
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        """Compress a chunk, ending the frame on the last one"""
+        mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK if more_body else zstandard.COMPRESSOBJ_FLUSH_FINISH
+        return self.compressor.compress(body) + self.compressor.flush(mode)
+    
+    async def send_with_zstd(self, message: Message):
+        message_type = message["type"]
+        
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self.initial_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+            return
+        
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if not self.started:
+            self.started = True
+            
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "zstd"
+            headers.add_vary_header("Accept-Encoding")
+            message["body"] = self._compress(body, more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+            
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+        
+        if not self.passthrough:
+            message["body"] = self._compress(body, more_body)
+        await self.send(message)
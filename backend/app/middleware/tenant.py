@@ -6,10 +6,14 @@ FastAPI middleware for multi-tenant isolation
 import uuid
 from typing import Optional
 from fastapi import Request, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
 from app.core.logging import get_logger
+from app.models.tenant import TenantUser
+from app.models.user import User
 
 logger = get_logger(__name__)
 
@@ -91,3 +95,17 @@ def get_tenant_context(request: Request) -> dict:
             detail="Tenant context not found"
         )
     return request.state.tenant_context
+
+
+async def is_tenant_member(db: AsyncSession, user: User, tenant_id: str) -> bool:
+    """Check whether the user has an active membership in the tenant"""
+    if user.is_superuser:
+        return True
+    
+    result = await db.execute(
+        select(TenantUser.tenant_id).where(
+            TenantUser.user_id == user.id,
+            TenantUser.is_active.is_(True)
+        )
+    )
+    return tenant_id in {str(member_tenant_id) for member_tenant_id in result.scalars()}
@@ -131,7 +131,7 @@ class SecurityEvent(Base):
     # Event details
     message = Column(Text, nullable=False)
     raw_log = Column(Text, nullable=True)
-    metadata = Column(JSON, default=dict)
+    event_metadata = Column("metadata", JSON, default=dict)
     
     # Threat analysis
     threat_type = Column(String(50), nullable=True)
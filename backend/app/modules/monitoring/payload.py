@@ -0,0 +1,62 @@
+"""
+NOCbRAIN Agent Payload Decoding
+Raw agent bodies: zstd-compressed, then AES-256-GCM encrypted with a key derived from the agent's API key
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Mapping, Tuple
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+import zstandard
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+NONCE_SIZE = 12
+
+
+@lru_cache(maxsize=1024)
+def _agent_cipher(api_key: str) -> AESGCM:
+    """AES-256-GCM cipher keyed the same way agents derive theirs from the API key"""
+    return AESGCM(hashlib.sha256(api_key.encode()).digest())
+
+
+def agent_body_encoding(headers: Mapping[str, str]) -> Tuple[bool, bool]:
+    """Whether an agent body is encrypted and/or zstd-compressed, from its request headers"""
+    encrypted = headers.get('content-type', '').startswith('application/octet-stream')
+    compressed = headers.get('x-payload-encoding') == 'zstd'
+    return encrypted, compressed
+
+
+def agent_api_key(headers: Mapping[str, str]) -> str:
+    """API key an agent encrypts with, which is also its bearer token"""
+    return headers.get('authorization', '').removeprefix('Bearer ').strip()
+
+
+def decrypt_agent_payload(encrypted_data: bytes, api_key: str) -> bytes:
+    """Decrypt a raw agent payload (12-byte nonce + ciphertext + tag)"""
+    try:
+        return _agent_cipher(api_key).decrypt(encrypted_data[:NONCE_SIZE], encrypted_data[NONCE_SIZE:], None)
+    except Exception as e:
+        logger.error(f"Failed to decrypt agent payload: {e}")
+        raise ValueError("Invalid encrypted data")
+
+
+def decompress_payload(compressed_data: bytes) -> bytes:
+    """Decompress zstd-compressed metrics data from agent"""
+    try:
+        return zstandard.ZstdDecompressor().decompress(compressed_data)
+    except Exception as e:
+        logger.error(f"Failed to decompress metrics: {e}")
+        raise ValueError("Invalid compressed data")
+
+
+def decode_agent_body(body: bytes, api_key: str, encrypted: bool, compressed: bool) -> bytes:
+    """Decrypt and decompress a raw agent body"""
+    if encrypted:
+        body = decrypt_agent_payload(body, api_key)
+    if compressed:
+        body = decompress_payload(body)
+    return body
@@ -1,14 +1,13 @@
 import asyncio
-import json
-import hashlib
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple, AsyncIterator
 from cryptography.fernet import Fernet
 import aiofiles
 import aiohttp
 
 from app.core.database import AsyncSession
 from app.core.config import settings
+from app.core.pubsub import Broadcaster
 from app.schemas.monitoring import (
     AgentRegistration, AgentResponse, AgentConfig,
     MetricsResponse, AlertRule, AlertResponse,
@@ -23,15 +22,17 @@ logger = get_logger(__name__)
 
 class MonitoringService:
     def __init__(self):
-        self.active_connections: Dict[str, Any] = {}
+        # Real-time snapshots and metric updates pushed to WebSocket subscribers
+        self.realtime = Broadcaster(self.get_realtime_metrics, interval=5.0, name="monitoring")
         self.encryption_key = settings.ENCRYPTION_KEY.encode()
         self.cipher = Fernet(self.encryption_key)
         
-    def decrypt_metrics(self, encrypted_data: str) -> str:
+    def decrypt_metrics(self, encrypted_data: Union[str, bytes]) -> bytes:
         """Decrypt metrics data from agent"""
         try:
-            decrypted = self.cipher.decrypt(encrypted_data.encode())
-            return decrypted.decode()
+            if isinstance(encrypted_data, str):
+                encrypted_data = encrypted_data.encode()
+            return self.cipher.decrypt(encrypted_data)
         except Exception as e:
             logger.error(f"Failed to decrypt metrics: {e}")
             raise ValueError("Invalid encrypted data")
@@ -60,6 +61,28 @@ class MonitoringService:
             logger.error(f"Failed to process metrics: {e}")
             raise
     
+    async def process_metrics_batch(self, items: List[Tuple[Dict[str, Any], int]]):
+        """Process a batch of queued agent metrics with a single storage write"""
+        try:
+            # Store all payloads in one write
+            await self._store_metrics_batch(items)
+            
+            latest: Dict[str, str] = {}
+            for metrics, user_id in items:
+                await self._check_alert_rules(metrics, user_id)
+                await self._broadcast_metrics(metrics)
+                latest[metrics.get('agent_id')] = metrics.get('timestamp')
+            
+            # Update each agent's status once, from its last payload in the batch
+            for agent_id, timestamp in latest.items():
+                await self._update_agent_status(agent_id, timestamp)
+            
+            logger.info(f"Processed {len(items)} metrics payloads from {len(latest)} agents")
+            
+        except Exception as e:
+            logger.error(f"Failed to process metrics batch: {e}")
+            raise
+    
     async def register_agent(self, agent_data: AgentRegistration, user_id: int) -> AgentResponse:
         """Register a new monitoring agent"""
         try:
@@ -111,13 +134,19 @@ class MonitoringService:
                        status_filter: Optional[str], user_id: int) -> List[AgentResponse]:
         """Get list of registered agents"""
         try:
-            # This would query database with filters
-            agents = []
-            return [AgentResponse.from_orm(agent) for agent in agents]
+            return [agent async for agent in self.iter_agents(db, skip, limit, status_filter, user_id)]
         except Exception as e:
             logger.error(f"Failed to get agents: {e}")
             raise
     
+    async def iter_agents(self, db: AsyncSession, skip: int, limit: int,
+                          status_filter: Optional[str], user_id: int) -> AsyncIterator[AgentResponse]:
+        """Stream registered agents one row at a time"""
+        # This would stream rows from the database (db.stream) with filters
+        agents = []
+        for agent in agents:
+            yield AgentResponse.from_orm(agent)
+    
     async def get_agent(self, db: AsyncSession, agent_id: str, user_id: int) -> Optional[AgentResponse]:
         """Get specific agent details"""
         try:
@@ -174,22 +203,12 @@ class MonitoringService:
             raise
     
     async def query_metrics(self, db: AsyncSession, agent_id: Optional[str],
-                        metric_type: str, time_range: str, aggregation: str,
-                        user_id: int) -> MetricsResponse:
-        """Query stored metrics"""
+                        metric_type: str, time_range: str, time_window: timedelta,
+                        aggregation: str, user_id: int) -> MetricsResponse:
+        """Query stored metrics over a parsed time window"""
         try:
-            # Parse time range
             end_time = datetime.utcnow()
-            if time_range.endswith('s'):
-                start_time = end_time - timedelta(seconds=int(time_range[:-1]))
-            elif time_range.endswith('m'):
-                start_time = end_time - timedelta(minutes=int(time_range[:-1]))
-            elif time_range.endswith('h'):
-                start_time = end_time - timedelta(hours=int(time_range[:-1]))
-            elif time_range.endswith('d'):
-                start_time = end_time - timedelta(days=int(time_range[:-1]))
-            else:
-                start_time = end_time - timedelta(hours=1)
+            start_time = end_time - time_window
             
             # Query metrics from database
             # This would implement actual database query
@@ -256,13 +275,19 @@ class MonitoringService:
                              acknowledged: Optional[bool], user_id: int) -> List[Dict[str, Any]]:
         """Get active alerts"""
         try:
-            # This would query database with filters
-            alerts = []
-            return alerts
+            return [alert async for alert in self.iter_active_alerts(db, severity, acknowledged, user_id)]
         except Exception as e:
             logger.error(f"Failed to get active alerts: {e}")
             raise
     
+    async def iter_active_alerts(self, db: AsyncSession, severity: Optional[str],
+                                 acknowledged: Optional[bool], user_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """Stream active alerts one row at a time"""
+        # This would stream rows from the database (db.stream) with filters
+        alerts = []
+        for alert in alerts:
+            yield alert
+    
     async def acknowledge_alert(self, db: AsyncSession, alert_id: str, user_id: int) -> bool:
         """Acknowledge an alert"""
         try:
@@ -307,21 +332,18 @@ class MonitoringService:
             logger.error(f"Failed to update heartbeat: {e}")
             raise
     
-    async def subscribe_to_metrics(self, websocket: Any, username: str):
-        """Subscribe user to real-time metrics"""
-        self.active_connections[username] = {
-            'websocket': websocket,
-            'subscribed_at': datetime.utcnow()
-        }
+    async def subscribe_to_metrics(self, username: str) -> asyncio.Queue:
+        """Subscribe user to real-time metrics, returning the queue of serialized updates"""
+        queue = self.realtime.subscribe()
         logger.info(f"User {username} subscribed to real-time metrics")
+        return queue
     
-    async def unsubscribe_from_metrics(self, username: str):
+    async def unsubscribe_from_metrics(self, queue: asyncio.Queue, username: str):
         """Unsubscribe user from real-time metrics"""
-        if username in self.active_connections:
-            del self.active_connections[username]
-            logger.info(f"User {username} unsubscribed from real-time metrics")
+        self.realtime.unsubscribe(queue)
+        logger.info(f"User {username} unsubscribed from real-time metrics")
     
-    async def get_realtime_metrics(self, username: str) -> Dict[str, Any]:
+    async def get_realtime_metrics(self, username: Optional[str] = None) -> Dict[str, Any]:
         """Get real-time metrics for WebSocket"""
         try:
             # This would get latest metrics from database or cache
@@ -370,6 +392,15 @@ class MonitoringService:
             logger.error(f"Failed to store metrics: {e}")
             raise
     
+    async def _store_metrics_batch(self, items: List[Tuple[Dict[str, Any], int]]):
+        """Store a batch of metrics in database"""
+        try:
+            # This would implement a single bulk insert (executemany) for the batch
+            pass
+        except Exception as e:
+            logger.error(f"Failed to store {len(items)} metrics payloads: {e}")
+            raise
+    
     async def _check_alert_rules(self, metrics: Dict[str, Any], user_id: int):
         """Check metrics against alert rules"""
         try:
@@ -494,21 +525,13 @@ class MonitoringService:
     async def _broadcast_metrics(self, metrics: Dict[str, Any]):
         """Broadcast metrics to WebSocket clients"""
         try:
-            message = json.dumps({
+            # Queue for all subscribers; each socket's handler does the sending
+            self.realtime.publish({
                 "type": "metrics_update",
                 "data": metrics,
                 "timestamp": datetime.utcnow().isoformat()
             })
             
-            # Send to all connected clients
-            for username, connection in self.active_connections.items():
-                try:
-                    await connection['websocket'].send_text(message)
-                except Exception as e:
-                    logger.error(f"Failed to send metrics to {username}: {e}")
-                    # Remove dead connection
-                    del self.active_connections[username]
-                    
         except Exception as e:
             logger.error(f"Failed to broadcast metrics: {e}")
     
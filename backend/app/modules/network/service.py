@@ -1,7 +1,7 @@
 import asyncio
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 import ipaddress
 import socket
 import subprocess
@@ -12,6 +12,7 @@ from netmiko import ConnectHandler
 import structlog
 
 from app.core.database import AsyncSession
+from app.core.pubsub import Broadcaster
 from app.schemas.network import (
     DeviceCreate, DeviceResponse, DeviceUpdate,
     NetworkScanRequest, NetworkScanResult, DiscoveredDevice,
@@ -27,6 +28,9 @@ class NetworkService:
     def __init__(self):
         self.active_scans: Dict[str, asyncio.Task] = {}
         
+        # Real-time network snapshots pushed to WebSocket subscribers
+        self.realtime = Broadcaster(self.get_realtime_data, interval=5.0, name="network")
+        
     async def add_device(self, db: AsyncSession, device_data: DeviceCreate, user_id: int) -> DeviceResponse:
         """Add a new network device for monitoring"""
         try:
@@ -83,9 +87,15 @@ class NetworkService:
     
     async def get_devices(self, db: AsyncSession, skip: int, limit: int, user_id: int) -> List[DeviceResponse]:
         """Get list of monitored devices"""
-        # This would query the database
-        # For now, return empty list
-        return []
+        return [device async for device in self.iter_devices(db, skip, limit, user_id)]
+    
+    async def iter_devices(self, db: AsyncSession, skip: int, limit: int, user_id: int) -> AsyncIterator[DeviceResponse]:
+        """Stream monitored devices one row at a time"""
+        # This would stream rows from the database (db.stream)
+        # For now, yield nothing
+        devices = []
+        for device in devices:
+            yield DeviceResponse.from_orm(device)
     
     async def get_device(self, db: AsyncSession, device_id: int, user_id: int) -> Optional[DeviceResponse]:
         """Get specific device details"""
@@ -178,6 +188,17 @@ class NetworkService:
         # This would update device SNMP configuration
         return {"message": "SNMP configuration updated successfully"}
     
+    async def subscribe_to_realtime(self, username: str) -> asyncio.Queue:
+        """Subscribe user to real-time network data, returning the queue of serialized updates"""
+        queue = self.realtime.subscribe()
+        logger.info(f"User {username} subscribed to real-time network data")
+        return queue
+    
+    async def unsubscribe_from_realtime(self, queue: asyncio.Queue, username: str):
+        """Unsubscribe user from real-time network data"""
+        self.realtime.unsubscribe(queue)
+        logger.info(f"User {username} unsubscribed from real-time network data")
+    
     async def get_realtime_data(self) -> Dict[str, Any]:
         """Get real-time network data for WebSocket"""
         # This would return current network status
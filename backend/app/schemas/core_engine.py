@@ -78,6 +78,7 @@ class KnowledgeQueryRequest(BaseModel):
     knowledge_type: Optional[str] = Field(None, description="Filter by knowledge type")
     top_k: int = Field(default=5, ge=1, le=20)
     similarity_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    ef_search: Optional[int] = Field(None, ge=1, le=512, description="HNSW search breadth, defaults to top_k * 4")
     
     class Config:
         schema_extra = {
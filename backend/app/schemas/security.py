@@ -95,6 +95,46 @@ class LogAnalysisResponse(BaseModel):
         }
 
 
+class AgentSecurityEvent(BaseModel):
+    """Security event detected by an agent, with the agent's analysis"""
+    event: Dict[str, Any]
+    analysis: Dict[str, Any] = Field(default_factory=dict)
+
+
+class SecurityEventBatch(BaseModel):
+    """Batch of security events posted by a security agent"""
+    agent_id: str
+    events: List[AgentSecurityEvent] = Field(..., max_items=1000)
+    timestamp: str
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "agent_id": "security-agent-001",
+                "events": [
+                    {
+                        "event": {
+                            "timestamp": "2024-02-14T10:30:00",
+                            "event_type": "brute_force",
+                            "severity": "high",
+                            "source_ip": "192.168.1.100",
+                            "target": "ssh",
+                            "description": "Brute force attack detected from 192.168.1.100",
+                            "raw_log": "",
+                            "confidence": 0.8,
+                            "metadata": {"attempts": 5, "time_window": "5 minutes"}
+                        },
+                        "analysis": {
+                            "threat_level": "high",
+                            "recommended_actions": ["Block source IP address"]
+                        }
+                    }
+                ],
+                "timestamp": "2024-02-14T10:30:01"
+            }
+        }
+
+
 class ThreatAlertRequest(BaseModel):
     """Request for threat alert"""
     alert_id: str
@@ -4,20 +4,56 @@ Pattern matching engine for XDR/SIEM log analysis and threat detection
 """
 
 import re
+from re import _parser as sre_parse
 import json
 import asyncio
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, AsyncIterator, List, Optional, Union, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 import ipaddress
 from collections import defaultdict, deque
+from bisect import bisect_right
 
 from app.core.config import settings
 from app.core.logging import get_logger
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = get_logger(__name__)
 
+# Shortest literal worth using as a prefilter needle
+MIN_NEEDLE_LENGTH = 3
+
+# Logs analyzed between yields to the event loop during a batch
+BATCH_YIELD_EVERY = 64
+
+
+def _required_literal(pattern: str) -> Optional[str]:
+    """Longest lowercased literal that every match of a regex must contain, or None"""
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+    
+    # Only top-level literal runs are guaranteed; groups, classes and repeats end a run
+    best, run = "", []
+    for op, value in list(parsed) + [(None, None)]:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        literal = "".join(run).lower()
+        if len(literal) > len(best):
+            best = literal
+        run = []
+    
+    if len(best) < MIN_NEEDLE_LENGTH or not best.isascii():
+        return None
+    return best
+
 
 class ThreatType(Enum):
     """Threat types for classification"""
@@ -88,6 +124,84 @@ class SecurityEvent:
         }
 
 
+class PatternPrefilter:
+    """Selects the patterns worth running against a message using required literals"""
+    
+    def __init__(self, patterns: List[SecurityPattern]):
+        self.patterns = list(patterns)
+        self.always: List[int] = []
+        needles: Dict[str, set] = defaultdict(set)
+        
+        for index, pattern in enumerate(self.patterns):
+            literals = [_required_literal(regex) for regex in pattern.patterns]
+            if not literals or any(literal is None or "\x00" in literal for literal in literals):
+                # A regex without a required literal has to be evaluated on every message
+                self.always.append(index)
+                continue
+            for literal in literals:
+                needles[literal].add(index)
+        self.needles = dict(needles)
+        
+        # One Aho-Corasick pass finds every needle when pyahocorasick is installed
+        self.automaton = None
+        if ahocorasick is not None and self.needles:
+            self.automaton = ahocorasick.Automaton()
+            for needle, indexes in self.needles.items():
+                self.automaton.add_word(needle, tuple(indexes))
+            self.automaton.make_automaton()
+    
+    def candidates(self, message: str) -> List[SecurityPattern]:
+        """Patterns that may match a message, in pattern order"""
+        # Case-insensitive regexes fold some non-ASCII characters, so only ASCII is prefiltered
+        if not message.isascii():
+            return self.patterns
+        
+        lowered = message.lower()
+        hits = set(self.always)
+        if self.automaton is not None:
+            for _, indexes in self.automaton.iter(lowered):
+                hits.update(indexes)
+        else:
+            for needle, indexes in self.needles.items():
+                if needle in lowered:
+                    hits.update(indexes)
+        return [self.patterns[index] for index in sorted(hits)]
+    
+    def candidates_batch(self, messages: List[str]) -> List[List[SecurityPattern]]:
+        """Candidate patterns for each message, from one scan over all ASCII messages"""
+        results: List[List[SecurityPattern]] = [self.patterns] * len(messages)
+        scanned = [i for i, message in enumerate(messages) if message.isascii()]
+        if not scanned:
+            return results
+        
+        # NUL-separated buffer; needles contain no NUL so a hit never spans two messages
+        buffer = "\x00".join(messages[i].lower() for i in scanned)
+        starts = []
+        offset = 0
+        for i in scanned:
+            starts.append(offset)
+            offset += len(messages[i]) + 1
+        
+        hits = [set(self.always) for _ in scanned]
+        if self.automaton is not None:
+            for end, indexes in self.automaton.iter(buffer):
+                hits[bisect_right(starts, end) - 1].update(indexes)
+        else:
+            for needle, indexes in self.needles.items():
+                pos = buffer.find(needle)
+                while pos != -1:
+                    segment = bisect_right(starts, pos) - 1
+                    hits[segment].update(indexes)
+                    # One hit per message is enough; resume at the next message
+                    if segment + 1 == len(starts):
+                        break
+                    pos = buffer.find(needle, starts[segment + 1])
+        
+        for segment, i in enumerate(scanned):
+            results[i] = [self.patterns[index] for index in sorted(hits[segment])]
+        return results
+
+
 class PatternEngine:
     """Main pattern matching engine for security analysis"""
     
@@ -103,6 +217,10 @@ class PatternEngine:
             "patterns_matched": defaultdict(int)
         }
         
+        # Serialized pattern list, reused until the pattern set changes
+        self._patterns_version = 0
+        self._patterns_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+        
         # Initialize default patterns
         self._load_default_patterns()
         
@@ -281,10 +399,20 @@ class PatternEngine:
         ]
         
         self.patterns.extend(default_patterns)
+        self.prefilter = PatternPrefilter(self.patterns)
+        self._patterns_version += 1
         logger.info(f"Loaded {len(default_patterns)} default security patterns")
     
     async def analyze_log(self, log_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Analyze a single log entry for security threats"""
+        return await self._analyze_log(log_data)
+    
+    async def _analyze_log(
+        self,
+        log_data: Dict[str, Any],
+        candidates: Optional[List[SecurityPattern]] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyze a log entry against the given candidate patterns, prefiltering if none are given"""
         try:
             # Parse log into SecurityEvent
             event = self._parse_log_event(log_data)
@@ -295,10 +423,13 @@ class PatternEngine:
             # Update statistics
             self.detection_stats["total_events"] += 1
             
-            # Check against all patterns
+            # Check against the patterns whose required literals occur in the message
             threats = []
             
-            for pattern in self.patterns:
+            if candidates is None:
+                candidates = self.prefilter.candidates(event.message)
+            
+            for pattern in candidates:
                 try:
                     matches = await self._check_pattern(event, pattern)
                     if matches:
@@ -322,15 +453,23 @@ class PatternEngine:
             logger.error(f"Failed to analyze log: {e}")
             return []
     
-    async def analyze_batch(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze multiple log entries"""
-        all_threats = []
-        
-        for log_data in logs:
-            threats = await self.analyze_log(log_data)
-            all_threats.extend(threats)
+    async def analyze_batch(self, logs: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Analyze multiple log entries, returning the threats for each log in order"""
+        return [threats async for _, threats in self.analyze_batch_iter(logs)]
+    
+    async def analyze_batch_iter(self, logs: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Analyze multiple log entries, yielding (index, threats) for each log as it is analyzed"""
+        messages = [log_data.get("message") or "" for log_data in logs]
+        candidates = self.prefilter.candidates_batch(
+            [message if isinstance(message, str) else "" for message in messages]
+        )
         
-        return all_threats
+        # Logs are analyzed in order since history and reputation depend on earlier logs;
+        # the loop yields periodically so a large batch does not monopolize the event loop
+        for i, (log_data, patterns) in enumerate(zip(logs, candidates)):
+            yield i, await self._analyze_log(log_data, patterns)
+            if (i + 1) % BATCH_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
     
     async def _check_pattern(self, event: SecurityEvent, pattern: SecurityPattern) -> List[Dict[str, Any]]:
         """Check if event matches security pattern"""
@@ -643,6 +782,8 @@ class PatternEngine:
         """Add custom security pattern"""
         try:
             self.patterns.append(pattern)
+            self.prefilter = PatternPrefilter(self.patterns)
+            self._patterns_version += 1
             logger.info(f"Added custom pattern: {pattern.name}")
             return {
                 "status": "success",
@@ -656,6 +797,26 @@ class PatternEngine:
                 "error": str(e)
             }
     
+    def get_patterns(self) -> List[Dict[str, Any]]:
+        """Get all patterns as dicts, serializing only after the pattern set changes"""
+        if self._patterns_cache is not None and self._patterns_cache[0] == self._patterns_version:
+            return self._patterns_cache[1]
+        
+        patterns = [
+            {
+                "name": pattern.name,
+                "threat_type": pattern.threat_type.value,
+                "severity": pattern.severity.value,
+                "description": pattern.description,
+                "patterns": pattern.patterns,
+                "conditions": pattern.conditions,
+                "tags": pattern.tags
+            }
+            for pattern in self.patterns
+        ]
+        self._patterns_cache = (self._patterns_version, patterns)
+        return patterns
+    
     async def get_stats(self) -> Dict[str, Any]:
         """Get pattern engine statistics"""
         return {
@@ -0,0 +1,211 @@
+import asyncio
+import importlib.util
+import json
+import random
+import socket
+import statistics
+from pathlib import Path
+
+import pytest
+
+AGENTS_DIR = Path(__file__).resolve().parents[2] / "agents"
+
+
+def load_agent(filename):
+    """Import an agent script by path (agent file names are not importable modules)"""
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], AGENTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ModuleNotFoundError as e:
+        pytest.skip(f"agent dependency {e.name} is not installed")
+    return module
+
+
+@pytest.fixture(scope="module")
+def monitoring_agent():
+    return load_agent("monitoring_agent.py")
+
+
+@pytest.fixture(scope="module")
+def nocbrain_agent():
+    return load_agent("nocbrain-agent.py")
+
+
+@pytest.fixture
+def metrics_agent(nocbrain_agent):
+    """Agent with encryption and compression enabled, as deployed"""
+    agent = nocbrain_agent.NOCBRAINAgent({
+        "server_url": "http://localhost:8000",
+        "api_key": "test-api-key",
+        "agent_id": "agent-test"
+    })
+    assert agent.encryption_enabled and agent.compression_enabled
+    return agent
+
+
+SAMPLE_METRICS = {
+    "agent_id": "agent-test",
+    "timestamp": "2024-02-14T10:30:00",
+    "system": {"cpu_percent": 12.5, "memory_percent": 40.0}
+}
+
+
+class TestRollingStats:
+    """Test rolling baseline statistics"""
+
+    def test_matches_window_statistics(self, monitoring_agent):
+        """Mean and std track the last `window` samples through evictions"""
+        rng = random.Random(42)
+        for window, count in ((1, 10), (2, 7), (50, 537), (256, 100)):
+            stats = monitoring_agent.RollingStats(window)
+            values = [rng.gauss(50, 5) for _ in range(count)]
+            for value in values:
+                stats.update(value)
+
+            recent = values[-window:]
+            assert stats.count == len(recent)
+            assert stats.mean == pytest.approx(statistics.mean(recent))
+            expected_std = statistics.stdev(recent) if len(recent) > 1 else 0.0
+            assert stats.std == pytest.approx(expected_std, abs=1e-9)
+
+    def test_constant_series_has_zero_std(self, monitoring_agent):
+        """A flat metric keeps no float-noise variance"""
+        stats = monitoring_agent.RollingStats(256)
+        for _ in range(1000):
+            stats.update(33.3)
+
+        assert stats.std == 0.0
+        assert stats.zscore(33.4) == 0.0
+        assert stats.zscore(33.4, min_std=1.0) == pytest.approx(0.1)
+
+    def test_small_change_on_flat_baseline_is_not_anomalous(self, monitoring_agent):
+        """A 0.1 point move on a steady metric does not raise an alert"""
+        agent = monitoring_agent.MonitoringAgent({})
+        for _ in range(100):
+            asyncio.run(agent.analyze_with_ai({"disk_usage": 33.3}))
+
+        analysis = asyncio.run(agent.analyze_with_ai({"disk_usage": 33.4}))
+        assert analysis["anomalies"] == []
+        assert analysis["severity"] == "normal"
+
+    def test_large_spike_is_anomalous(self, monitoring_agent):
+        """A spike well above the baseline is flagged even below the fixed threshold"""
+        agent = monitoring_agent.MonitoringAgent({})
+        for _ in range(100):
+            asyncio.run(agent.analyze_with_ai({"disk_usage": 33.3}))
+
+        analysis = asyncio.run(agent.analyze_with_ai({"disk_usage": 60.0}))
+        assert analysis["anomalies"] == ["Unusual rise in disk usage"]
+        assert analysis["severity"] == "warning"
+
+    def test_threshold_alerts_without_baseline(self, monitoring_agent):
+        """A host that starts full alerts on its first sample"""
+        agent = monitoring_agent.MonitoringAgent({})
+
+        analysis = asyncio.run(agent.analyze_with_ai({"disk_usage": 99.0, "cpu_percent": 5.0}))
+        assert analysis["anomalies"] == ["Low disk space"]
+        assert analysis["severity"] == "critical"
+
+    def test_threshold_alerts_on_steady_high_value(self, monitoring_agent):
+        """A value that stays above the threshold keeps alerting once it is the baseline"""
+        agent = monitoring_agent.MonitoringAgent({})
+        for _ in range(100):
+            analysis = asyncio.run(agent.analyze_with_ai({"cpu_percent": 95.0}))
+
+        assert analysis["anomalies"] == ["High CPU usage detected"]
+        assert analysis["severity"] == "warning"
+
+
+class TestScanPorts:
+    """Test TCP port scanning"""
+
+    def test_unresolvable_target_reports_ports_closed(self, monitoring_agent, monkeypatch):
+        """A resolution failure reports every port closed instead of raising"""
+        def fail(*args, **kwargs):
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        monkeypatch.setattr(monitoring_agent.socket, "getaddrinfo", fail)
+        assert monitoring_agent.scan_ports("no-such-host.invalid", [22, 80]) == {"22": False, "80": False}
+
+    def test_later_addresses_are_tried(self, monitoring_agent, monkeypatch):
+        """An open IPv4 port is found even when an unreachable IPv6 address sorts first"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        port = server.getsockname()[1]
+
+        def resolve(host, port_arg, *args, **kwargs):
+            return [
+                (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("::1", 0, 0, 0)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", 0))
+            ]
+
+        monkeypatch.setattr(monitoring_agent.socket, "getaddrinfo", resolve)
+        try:
+            status = monitoring_agent.scan_ports("dual-stack.test", [port], timeout=1.0)
+        finally:
+            server.close()
+        assert status == {str(port): True}
+
+
+    def test_ping_reuses_port_scan(self, monitoring_agent, monkeypatch):
+        """The port 80 connect time comes from the scan, not a second handshake"""
+        calls = []
+
+        def probe(target, ports, timeout=1.0):
+            calls.append(list(ports))
+            return {80: 0.012, 443: 0.010}
+
+        monkeypatch.setattr(monitoring_agent, "probe_ports", probe)
+        agent = monitoring_agent.MonitoringAgent({})
+        metrics = asyncio.run(agent.collect_network_metrics("web.test"))
+
+        assert len(calls) == 1
+        assert metrics.ping_time == pytest.approx(12.0)
+        assert metrics.port_status["80"] and metrics.port_status["443"]
+        assert not metrics.port_status["22"]
+
+    def test_open_port_reports_connect_time(self, monitoring_agent):
+        """Open ports map to a connect time; closed ones are absent"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        port = server.getsockname()[1]
+        try:
+            connect_times = monitoring_agent.probe_ports("127.0.0.1", [port], timeout=1.0)
+        finally:
+            server.close()
+        assert list(connect_times) == [port]
+        assert 0.0 <= connect_times[port] < 1.0
+
+class TestAgentPayload:
+    """Test agent payloads decode on the server"""
+
+    def test_encoded_payload_round_trip(self, metrics_agent):
+        """AES-GCM + zstd bodies built by the agent decode with the server's agent cipher"""
+        from app.modules.monitoring.payload import decode_agent_body
+
+        body = metrics_agent._encode_payload(SAMPLE_METRICS)
+        decoded = decode_agent_body(body, "test-api-key", encrypted=True, compressed=True)
+        assert json.loads(decoded) == SAMPLE_METRICS
+
+    def test_wrong_api_key_is_rejected(self, metrics_agent):
+        """A body encrypted for another API key fails authentication"""
+        from app.modules.monitoring.payload import decode_agent_body
+
+        body = metrics_agent._encode_payload(SAMPLE_METRICS)
+        with pytest.raises(ValueError):
+            decode_agent_body(body, "other-api-key", encrypted=True, compressed=True)
+
+    def test_prepared_request_decodes_from_headers(self, metrics_agent):
+        """The body and headers the agent posts carry everything the metrics endpoints need to decode it"""
+        from app.modules.monitoring.payload import agent_api_key, agent_body_encoding, decode_agent_body
+
+        body, extra_headers = asyncio.run(metrics_agent._prepare_body(SAMPLE_METRICS))
+        headers = {k.lower(): v for k, v in {**metrics_agent.headers, **extra_headers}.items()}
+
+        encrypted, compressed = agent_body_encoding(headers)
+        assert encrypted and compressed
+        decoded = decode_agent_body(body, agent_api_key(headers), encrypted, compressed)
+        assert json.loads(decoded) == SAMPLE_METRICS
@@ -0,0 +1,164 @@
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+PATTERN_ENGINE_PATH = Path(__file__).resolve().parents[1] / "app" / "security-analyzer" / "pattern_engine.py"
+
+SAMPLE_LOGS = [
+    "Failed password for root from 192.168.1.100 port 22 ssh2",
+    "pam_unix(sshd:auth): authentication failure; logname= uid=0 rhost=10.0.0.5",
+    "Invalid user admin from 203.0.113.9",
+    "An account failed to log on. Failed logon Source Network Address: 10.1.2.3",
+    "User 'jdoe' logged in from 172.16.0.4",
+    "sudo: alice : TTY=pts/0 ; PWD=/home/alice ; USER=root ; COMMAND=/bin/bash",
+    "port scan detected from 198.51.100.7",
+    "malware detected: evil.exe",
+    "trojan dropper spawned process svchost.exe",
+    "C2 communication to 45.33.32.156",
+    "GET /search?q=1' OR 1=1 -- HTTP/1.1",
+    "<img src=x onerror=alert(1)>",
+    "<script src=//x.test>alert(1)</script>",
+    "large file transfer: dump.sql size 73400320",
+    "User bob logged in at 03:12:44",
+    "login succeeded for user: carol time: 02:00:01",
+    "Accepted publickey for deploy from 10.0.0.8 port 51234 ssh2",
+    "",
+]
+
+# Case-insensitive regexes match these against ASCII letters ('ſ' ~ 's', 'K' ~ 'k', 'ı' ~ 'i')
+NON_ASCII_LOGS = [
+    "Failed paſsword for root from 192.168.1.100",
+    "Invalid uſer admin from 10.0.0.1",
+    "port ſcan detected from 10.0.0.2",
+    "User 'joão' logged in from 10.0.0.3",
+    "malware detected: ransomware-K.exe",
+    "javaſcript:alert(1)",
+    "C2 communıcation to 10.0.0.4",
+    "Ошибка: Failed password for root from 10.0.0.5",
+]
+
+
+def load_pattern_engine():
+    """Import the pattern engine by path (the security-analyzer package is not importable)"""
+    spec = importlib.util.spec_from_file_location("pattern_engine", PATTERN_ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ModuleNotFoundError as e:
+        pytest.skip(f"pattern engine dependency {e.name} is not installed")
+    return module
+
+
+@pytest.fixture(scope="module")
+def pattern_engine():
+    return load_pattern_engine()
+
+
+@pytest.fixture(scope="module")
+def engine(pattern_engine):
+    return pattern_engine.PatternEngine()
+
+
+def matching_patterns(patterns, message):
+    """Indexes of the patterns with a regex that matches the message"""
+    return {
+        index for index, pattern in enumerate(patterns)
+        if any(regex.search(message) for regex in pattern.compiled_patterns)
+    }
+
+
+def candidate_indexes(patterns, candidates):
+    positions = {id(pattern): index for index, pattern in enumerate(patterns)}
+    return {positions[id(pattern)] for pattern in candidates}
+
+
+def fuzzed_logs(prefilter, count, seed=1337):
+    """Messages stitched from needles, needle halves, IPs and noise in random case"""
+    rng = random.Random(seed)
+    fragments = list(prefilter.needles)
+    fragments += [needle[:len(needle) // 2] for needle in prefilter.needles]
+    fragments += [needle[len(needle) // 2:] for needle in prefilter.needles]
+    fragments += ["10.0.0.1", "from ", " ", "'", "=", ":", "12:34:56", "size 42", "--", "\x00", "ſ", "é"]
+
+    logs = []
+    for _ in range(count):
+        parts = rng.choices(fragments, k=rng.randint(1, 6))
+        message = "".join(parts)
+        logs.append("".join(c.upper() if rng.random() < 0.3 else c for c in message))
+    return logs
+
+
+class TestPatternPrefilter:
+    """Test the prefilter never drops a pattern whose regex matches"""
+
+    def test_candidates_cover_matching_patterns(self, engine):
+        """candidates(m) is a superset of the patterns matching m"""
+        prefilter = engine.prefilter
+        for message in SAMPLE_LOGS + NON_ASCII_LOGS + fuzzed_logs(prefilter, 2000):
+            expected = matching_patterns(engine.patterns, message)
+            candidates = candidate_indexes(engine.patterns, prefilter.candidates(message))
+            assert expected <= candidates, message
+
+    def test_samples_are_not_all_candidates(self, engine):
+        """The prefilter still narrows plain ASCII logs"""
+        prefilter = engine.prefilter
+        candidates = prefilter.candidates("Accepted publickey for deploy from 10.0.0.8 port 51234 ssh2")
+        assert len(candidates) < len(engine.patterns)
+
+    def test_non_ascii_matches_are_kept(self, engine):
+        """Case folding of non-ASCII characters cannot hide a match"""
+        prefilter = engine.prefilter
+        for message in NON_ASCII_LOGS:
+            expected = matching_patterns(engine.patterns, message)
+            assert expected, message
+            assert expected <= candidate_indexes(engine.patterns, prefilter.candidates(message)), message
+
+    def test_batch_matches_single_candidates(self, engine):
+        """candidates_batch returns the same candidates as candidates for every message"""
+        prefilter = engine.prefilter
+        messages = SAMPLE_LOGS + NON_ASCII_LOGS + fuzzed_logs(prefilter, 2000, seed=7)
+        random.Random(3).shuffle(messages)
+
+        for message, candidates in zip(messages, prefilter.candidates_batch(messages)):
+            assert candidates == prefilter.candidates(message), message
+            expected = matching_patterns(engine.patterns, message)
+            assert expected <= candidate_indexes(engine.patterns, candidates), message
+
+    def test_batch_needles_do_not_span_messages(self, engine):
+        """A needle split across adjacent messages is not credited to either one"""
+        prefilter = engine.prefilter
+        messages = []
+        for needle in prefilter.needles:
+            half = len(needle) // 2
+            messages += [needle[:half], needle[half:]]
+        messages += ["", "Failed password for ", "root from 10.0.0.1", "\x00nmap scan from 10.0.0.2\x00"]
+
+        for message, candidates in zip(messages, prefilter.candidates_batch(messages)):
+            assert candidates == prefilter.candidates(message), repr(message)
+            expected = matching_patterns(engine.patterns, message)
+            assert expected <= candidate_indexes(engine.patterns, candidates), repr(message)
+
+    def test_batch_keeps_matches_at_boundaries(self, engine):
+        """Needles at the very start and end of neighbouring messages are all found"""
+        prefilter = engine.prefilter
+        messages = SAMPLE_LOGS[:3] + ["WAITFOR DELAY '0:0:5'", "x javascript:", "1=1", "ſ javascript:"]
+
+        for message, candidates in zip(messages, prefilter.candidates_batch(messages)):
+            expected = matching_patterns(engine.patterns, message)
+            assert expected <= candidate_indexes(engine.patterns, candidates), repr(message)
+
+    def test_regex_without_literal_is_always_a_candidate(self, pattern_engine, engine):
+        """Patterns with no required literal are evaluated on every message"""
+        pattern = pattern_engine.SecurityPattern(
+            name="Any IP",
+            threat_type=engine.patterns[0].threat_type,
+            severity=engine.patterns[0].severity,
+            description="Any IPv4 address",
+            patterns=[r"(\d+\.\d+\.\d+\.\d+)"],
+            conditions={}
+        )
+        prefilter = pattern_engine.PatternPrefilter(engine.patterns + [pattern])
+        for candidates in prefilter.candidates_batch(["nothing here", "ping 10.0.0.1", ""]):
+            assert pattern in candidates